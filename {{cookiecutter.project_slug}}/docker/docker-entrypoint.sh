@@ -3,6 +3,12 @@
 # stop the script if any command fails
 set -e
 
+# Start with empty multiprocess metric files, stale ones would be added to the new totals
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
 # Run Alembic migrations
 alembic upgrade head
 
@@ -0,0 +1,10 @@
+# Loaded by gunicorn from the working directory, on top of the command line options
+import os
+
+
+def child_exit(server, worker):
+    # Drop the live gauges of a worker that exited, its metric files are still read by the others
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,108 @@
+"""
+Measure email throughput against local SMTP and SES stand-ins.
+
+An aiosmtpd server and moto's in-process SES mock replace the real transports, so no network
+access is needed. Redis still has to be reachable since the app's helpers connect on import.
+
+    python scripts/benchmark_email_throughput.py --messages 500
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("SMTP_HOST", "127.0.0.1")
+os.environ.setdefault("SMTP_PORT", "8025")
+os.environ.setdefault("SMTP_USE_TLS", "false")
+os.environ["SMTP_USERNAME"] = ""
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+import boto3  # noqa: E402
+from aiosmtpd.controller import Controller  # noqa: E402
+from aiosmtpd.handlers import Sink  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+from src.core.config import config  # noqa: E402
+from src.core.helpers.email import EmailHelper  # noqa: E402
+from src.core.helpers.ses import SESHelper, get_ses_client  # noqa: E402
+from src.core.helpers.smtp import SMTPHelper, smtp_connection_pool  # noqa: E402
+
+
+def report(name: str, count: int, elapsed: float) -> None:
+    print(f"{name:<40} {count:>6} emails in {elapsed:>7.2f}s  {count / elapsed:>9.1f} emails/s")
+
+
+def build_messages(count: int) -> list[dict]:
+    return [
+        {
+            "email_from": config.SMTP_EMAIL_FROM,
+            "email_to": [f"user-{index}@example.com"],
+            "email_subject": "Benchmark",
+            "email_body": f"<p>Message {index}</p>",
+        }
+        for index in range(count)
+    ]
+
+
+def benchmark_smtp(messages: list[dict]) -> None:
+    helper = EmailHelper()
+    mime_messages = [(m["email_from"], m["email_to"], helper.build_message(**m)) for m in messages]
+
+    # One session per email, as before pooling
+    start_time = time.perf_counter()
+    for message in mime_messages:
+        SMTPHelper().send_email(*message)
+        smtp_connection_pool.close_all()
+    report("smtp: new session per email", len(mime_messages), time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    for message in mime_messages:
+        SMTPHelper().send_email(*message)
+    report("smtp: pooled session per email", len(mime_messages), time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    SMTPHelper().send_emails(mime_messages)
+    report("smtp: batched send_emails", len(mime_messages), time.perf_counter() - start_time)
+
+
+def benchmark_ses(messages: list[dict]) -> None:
+    helper = EmailHelper()
+    mime_messages = [(m["email_from"], m["email_to"], helper.build_message(**m)) for m in messages]
+
+    with mock_aws():
+        get_ses_client.cache_clear()
+        boto3.client("ses").verify_email_identity(EmailAddress=config.SMTP_EMAIL_FROM)
+
+        # A new client per email, as before the client was shared
+        start_time = time.perf_counter()
+        for email_from, email_to, email_body in mime_messages:
+            boto3.client("ses").send_raw_email(
+                Source=email_from, Destinations=email_to, RawMessage={"Data": email_body.as_string()}
+            )
+        report("ses: new client per email", len(mime_messages), time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        SESHelper().send_emails(mime_messages)
+        report("ses: shared client, concurrent", len(mime_messages), time.perf_counter() - start_time)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200)
+    args = parser.parse_args()
+
+    # The SES stand-in has no quota, lift the limiter so the client reuse is what gets measured
+    config.SES_MAX_SEND_RATE = 0
+
+    messages = build_messages(args.messages)
+    controller = Controller(Sink(), hostname=config.SMTP_HOST, port=config.SMTP_PORT)
+    controller.start()
+    try:
+        benchmark_smtp(messages)
+    finally:
+        smtp_connection_pool.close_all()
+        controller.stop()
+
+    benchmark_ses(messages)
@@ -0,0 +1,84 @@
+"""
+Check that the asyncio worker runs jobs through rq's own bookkeeping, against the task queue's Redis.
+
+A single-slot worker runs a coroutine job from a throwaway queue. While the job runs it should be
+in the started registry and be the current job of the slot's rq worker. Once it finished, it
+should have left the started registry and the intermediate queue, and be finished.
+
+    python scripts/check_async_worker.py --job-seconds 2
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from typing import Callable
+
+from loguru import logger
+from rq import Queue, Worker
+from rq.job import JobStatus
+
+from src.core.helpers.async_worker import AsyncWorker
+from src.core.helpers.redis import task_queue
+
+
+async def wait_for(condition: Callable[[], bool], timeout_seconds: float) -> bool:
+    deadline = time.monotonic() + timeout_seconds
+    while time.monotonic() < deadline:
+        if await asyncio.to_thread(condition):
+            return True
+        await asyncio.sleep(0.05)
+
+    return False
+
+
+async def check_async_worker(job_seconds: float) -> int:
+    # A single queue, so the worker dequeues through rq's intermediate queue
+    queue = Queue(f"check-async-worker-{uuid.uuid4().hex[:8]}", connection=task_queue)
+    worker = AsyncWorker(queues=[queue], concurrency=1)
+    worker_task = asyncio.create_task(worker.run())
+    failures = []
+    try:
+        # rq can't run functions of the __main__ module, any importable coroutine function will do
+        job = queue.enqueue(asyncio.sleep, job_seconds)
+        if not await wait_for(lambda: job.get_status() == JobStatus.STARTED, timeout_seconds=10):
+            failures.append("The job never started")
+        else:
+            if job.id not in queue.started_job_registry.get_job_ids():
+                failures.append("The running job is not in the started registry")
+            slot_worker = Worker.find_by_key(worker.slot_workers[0].key, connection=task_queue)
+            if slot_worker is None or slot_worker.get_current_job_id() != job.id:
+                failures.append("The running job is not the current job of the slot's rq worker")
+
+        ended = await wait_for(
+            lambda: job.get_status() in (JobStatus.FINISHED, JobStatus.FAILED), timeout_seconds=job_seconds + 10
+        )
+        if not ended:
+            failures.append("The job never finished")
+        else:
+            if job.get_status() != JobStatus.FINISHED:
+                failures.append(f"The job ended as {job.get_status()}")
+            if job.id in queue.started_job_registry.get_job_ids():
+                failures.append("The finished job is still in the started registry")
+            if job.id in queue.intermediate_queue.get_job_ids():
+                failures.append("The finished job is still in the intermediate queue")
+    finally:
+        worker.stop()
+        await worker_task
+        queue.delete(delete_jobs=True)
+
+    for failure in failures:
+        logger.error(failure)
+    if not failures:
+        logger.info("The job went through the started registry and left the intermediate queue")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--job-seconds", type=float, default=2, help="how long the checked job runs")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(check_async_worker(job_seconds=args.job_seconds)))
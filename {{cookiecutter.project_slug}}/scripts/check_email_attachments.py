@@ -0,0 +1,65 @@
+"""
+Check the attachment pipeline against a local S3 stand-in.
+
+moto's in-process S3 mock serves a generated report, which is attached to a batch of emails.
+The report should be downloaded once and encoded once, however many emails attach it.
+
+    python scripts/check_email_attachments.py --recipients 1000 --size-kb 2048
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+import boto3  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+from src.core.config import config  # noqa: E402
+from src.core.helpers.attachments import attachment_cache, encoded_payload_cache  # noqa: E402
+from src.core.helpers.email import EmailHelper  # noqa: E402
+from src.core.helpers.s3 import get_s3_client  # noqa: E402
+
+
+def check_email_attachments(recipients: int, size_kb: int) -> int:
+    attachment_cache.cache_dir = tempfile.mkdtemp(prefix="email-attachments-")
+    bucket, key = "reports", "monthly/report.csv"
+
+    with mock_aws():
+        get_s3_client.cache_clear()
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket=bucket)
+        s3.put_object(Bucket=bucket, Key=key, Body=os.urandom(size_kb * 1024))
+
+        helper = EmailHelper()
+        attachments = [{"type": "s3", "s3_uri": f"s3://{bucket}/{key}"}]
+        start_time = time.perf_counter()
+        for index in range(recipients):
+            helper.build_message(
+                email_from=config.SMTP_EMAIL_FROM,
+                email_to=[f"user-{index}@example.com"],
+                email_subject="Monthly report",
+                email_body="<p>Your report is attached</p>",
+                attachments=attachments,
+            )
+        elapsed = time.perf_counter() - start_time
+
+    print(f"Built {recipients} emails with a {size_kb} KiB attachment in {elapsed:.2f}s")
+    print(f"Downloads: {attachment_cache.downloads}, cache hits: {attachment_cache.hits}")
+    print(f"Encodes: {encoded_payload_cache.misses}, encoded payload reuses: {encoded_payload_cache.hits}")
+
+    return 0 if attachment_cache.downloads == 1 and encoded_payload_cache.misses == 1 else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=1000)
+    parser.add_argument("--size-kb", type=int, default=1024)
+    args = parser.parse_args()
+
+    sys.exit(check_email_attachments(recipients=args.recipients, size_kb=args.size_kb))
@@ -0,0 +1,105 @@
+"""
+Check that a batch of emails falls back to SES only for the emails the SMTP relay didn't take.
+
+A local aiosmtpd relay accepts the first emails of the batch and then drops the connection on
+every email after them, and moto's in-process SES mock stands in for SES. Every email should be
+sent exactly once: the first ones by the relay, the rest through SES. Redis still has to be
+reachable for the circuit breakers.
+
+    python scripts/check_email_fallback.py --messages 20 --drop-after 8
+"""
+
+import argparse
+import os
+import sys
+
+os.environ.setdefault("SMTP_HOST", "127.0.0.1")
+os.environ.setdefault("SMTP_PORT", "8025")
+os.environ.setdefault("SMTP_USE_TLS", "false")
+os.environ["SMTP_USERNAME"] = ""
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+import boto3  # noqa: E402
+from aiosmtpd.controller import Controller  # noqa: E402
+from moto import mock_aws  # noqa: E402
+from moto.core import DEFAULT_ACCOUNT_ID  # noqa: E402
+from moto.ses.models import ses_backends  # noqa: E402
+
+from src.core.config import config  # noqa: E402
+from src.core.helpers.circuit_breaker import ses_circuit_breaker, smtp_circuit_breaker  # noqa: E402
+from src.core.helpers.email import EmailHelper  # noqa: E402
+from src.core.helpers.ses import get_ses_client  # noqa: E402
+from src.core.helpers.smtp import smtp_connection_pool  # noqa: E402
+
+
+class DroppingRelay:
+    """aiosmtpd handler that accepts `drop_after` emails, then drops the connection on every email."""
+
+    def __init__(self, drop_after: int) -> None:
+        self.drop_after = drop_after
+        self.recipients: list[str] = []
+
+    async def handle_DATA(self, server, session, envelope) -> str:
+        if len(self.recipients) >= self.drop_after:
+            server.transport.close()
+            return "421 Closing connection"
+
+        self.recipients.extend(envelope.rcpt_tos)
+        return "250 OK"
+
+
+def check_email_fallback(messages: int, drop_after: int) -> int:
+    relay = DroppingRelay(drop_after=drop_after)
+    controller = Controller(relay, hostname=config.SMTP_HOST, port=config.SMTP_PORT)
+    emails = [
+        {
+            "email_from": config.SMTP_EMAIL_FROM,
+            "email_to": [f"user-{index}@example.com"],
+            "email_subject": "Fallback check",
+            "email_body": f"<p>Message {index}</p>",
+        }
+        for index in range(messages)
+    ]
+
+    # Start from closed circuits, and without an SES quota to wait on
+    smtp_circuit_breaker.record_success()
+    ses_circuit_breaker.record_success()
+    config.SES_MAX_SEND_RATE = 0
+
+    controller.start()
+    try:
+        with mock_aws():
+            get_ses_client.cache_clear()
+            boto3.client("ses").verify_email_identity(EmailAddress=config.SMTP_EMAIL_FROM)
+            results = EmailHelper().send_emails(emails)
+            ses_sent = len(ses_backends[DEFAULT_ACCOUNT_ID][os.environ["AWS_DEFAULT_REGION"]].sent_messages)
+    finally:
+        smtp_connection_pool.close_all()
+        controller.stop()
+        smtp_circuit_breaker.record_success()
+
+    relay_sent = len(relay.recipients)
+    print(f"Sent {relay_sent} emails through the relay and {ses_sent} through SES, out of {messages}")
+
+    failures = []
+    if not all(results):
+        failures.append(f"{results.count(False)} emails were reported as not sent")
+    if relay_sent != drop_after:
+        failures.append(f"The relay took {relay_sent} emails, expected {drop_after}")
+    if relay_sent + ses_sent != messages:
+        failures.append(f"{relay_sent + ses_sent} emails went out for {messages} messages")
+    for failure in failures:
+        print(failure)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--drop-after", type=int, default=8, help="emails the relay takes before dropping")
+    args = parser.parse_args()
+
+    sys.exit(check_email_fallback(messages=args.messages, drop_after=args.drop_after))
@@ -0,0 +1,69 @@
+"""
+Integration check for running behind PgBouncer in transaction pooling mode.
+
+Start the stand-in with `docker-compose --profile pgbouncer up -d pgbouncer` and run:
+
+    DB_HOST=pgbouncer DB_PORT=6432 DB_PGBOUNCER_MODE=true python scripts/check_pgbouncer.py
+
+Many concurrent sessions repeat the same statements in short transactions, so consecutive
+transactions land on different server connections. Without PgBouncer mode this fails with
+"prepared statement ... already exists" or "does not exist" errors.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from loguru import logger
+from sqlalchemy import func, select, text
+
+from src.core.config import config
+from src.database.session import AsyncSessionLocal, async_engine
+from src.users.crud import crud_user
+from src.users.models import User
+
+
+async def run_session(iterations: int) -> None:
+    for _ in range(iterations):
+        async with AsyncSessionLocal() as session:
+            await crud_user.get_by_email(session, email="admin@admin.com")
+            await session.execute(select(func.count()).select_from(User))
+            await session.commit()
+
+
+async def check_pgbouncer(concurrency: int, iterations: int) -> int:
+    if not config.DB_PGBOUNCER_MODE:
+        logger.warning("DB_PGBOUNCER_MODE is not set, expect prepared statement errors behind PgBouncer")
+
+    async with async_engine.connect() as connection:
+        server_version = await connection.scalar(text("SHOW server_version"))
+        logger.info(f"Connected to {config.DB_HOST}:{config.DB_PORT} (Postgres {server_version})")
+
+    start_time = time.perf_counter()
+    results = await asyncio.gather(
+        *(run_session(iterations) for _ in range(concurrency)),
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - start_time
+
+    errors = [result for result in results if isinstance(result, Exception)]
+    for error in errors:
+        logger.error(f"{error.__class__.__name__}: {error}")
+
+    logger.info(
+        f"{concurrency - len(errors)}/{concurrency} sessions completed {iterations} transactions each "
+        f"in {elapsed:.2f}s ({async_engine.pool.status()})"
+    )
+    await async_engine.dispose()
+
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(check_pgbouncer(concurrency=args.concurrency, iterations=args.iterations)))
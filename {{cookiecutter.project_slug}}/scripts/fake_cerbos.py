@@ -0,0 +1,61 @@
+"""
+A local stand-in for the Cerbos policy decision point, serving the gRPC CheckResources call.
+
+Every check is allowed, optionally after a fixed delay to mimic the round trip to a real PDP,
+so the app can run without the Cerbos container or network access. Policies are not evaluated.
+
+    python scripts/fake_cerbos.py --port 3593 --latency-ms 1
+"""
+
+import argparse
+import asyncio
+
+import grpc
+from cerbos.effect.v1 import effect_pb2
+from cerbos.response.v1 import response_pb2
+from cerbos.svc.v1 import svc_pb2_grpc
+from loguru import logger
+
+
+class FakeCerbosService(svc_pb2_grpc.CerbosServiceServicer):
+    def __init__(self, latency_seconds: float = 0) -> None:
+        self.latency_seconds = latency_seconds
+
+    async def CheckResources(self, request, context) -> response_pb2.CheckResourcesResponse:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+
+        return response_pb2.CheckResourcesResponse(
+            request_id=request.request_id,
+            results=[
+                response_pb2.CheckResourcesResponse.ResultEntry(
+                    resource=response_pb2.CheckResourcesResponse.ResultEntry.Resource(
+                        id=entry.resource.id,
+                        kind=entry.resource.kind,
+                        policy_version=entry.resource.policy_version or "default",
+                        scope=entry.resource.scope,
+                    ),
+                    actions={action: effect_pb2.EFFECT_ALLOW for action in entry.actions},
+                )
+                for entry in request.resources
+            ],
+        )
+
+
+async def serve(host: str, port: int, latency_ms: float) -> None:
+    server = grpc.aio.server()
+    svc_pb2_grpc.add_CerbosServiceServicer_to_server(FakeCerbosService(latency_seconds=latency_ms / 1000), server)
+    server.add_insecure_port(f"{host}:{port}")
+    await server.start()
+    logger.info(f"Fake Cerbos listening on {host}:{port}, allowing every check after {latency_ms} ms")
+    await server.wait_for_termination()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3593)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    asyncio.run(serve(host=args.host, port=args.port, latency_ms=args.latency_ms))
@@ -0,0 +1,248 @@
+"""
+Fill the users, MFA attempt and blacklisted token tables with synthetic rows at production scale.
+
+Rows are generated from a seeded random generator, so the same seed and arguments give the same
+data. Only the bcrypt salts of the password pool differ between runs. A small pool of passwords
+is hashed up front and shared across the accounts; every password is `synthetic-password-<n>`.
+The rows are written with COPY in chunks, then the tables are analyzed so the planner sees the
+new volume.
+
+    python scripts/generate_synthetic_data.py --users 1000000 --blacklisted-tokens 3000000 --truncate
+    python scripts/generate_synthetic_data.py --roles user=90,viewer=6,editor=3,admin=1 --mfa-ratio 0.5
+"""
+
+import argparse
+import asyncio
+import base64
+import random
+import string
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+import asyncpg
+from loguru import logger
+from sqlalchemy.engine import make_url
+
+from src.core.config import config
+from src.core.constants import Environment, TokenType, UserRoles
+from src.core.security.passwords import Password
+from src.users.models import BlacklistedToken, MFAAttempt, User
+
+USER_COLUMNS = [
+    "id",
+    "email",
+    "password",
+    "full_name",
+    "is_active",
+    "is_mfa_enabled",
+    "email_verified",
+    "is_blocked",
+    "blocked_until",
+    "last_login",
+    "created_at",
+    "updated_at",
+    "assigned_roles",
+]
+MFA_ATTEMPT_COLUMNS = ["user_id", "code", "code_expires_at", "incorrect_attempts_count", "resend_count"]
+BLACKLISTED_TOKEN_COLUMNS = ["token", "token_type", "blacklisted_on", "created_by_id"]
+
+
+def parse_weights(value: str, enum_class: type) -> dict:
+    """
+    Parse `name=weight` pairs, e.g. "user=90,admin=1", into weights per enum member.
+    """
+    weights = {}
+    for pair in value.split(","):
+        name, weight = pair.split("=")
+        weights[enum_class(name.strip())] = float(weight)
+
+    return weights
+
+
+class SyntheticDataGenerator:
+    """
+    Generates the rows of every table from one seed. User ids are derived from the seed and the
+    user's index, so tokens can reference any user without keeping millions of ids in memory.
+    """
+
+    def __init__(self, args: argparse.Namespace, now: datetime, password_pool: list[str]) -> None:
+        self.args = args
+        self.now = now
+        self.password_pool = password_pool
+        self.rng = random.Random(args.seed)
+        self.namespace = uuid.uuid5(uuid.NAMESPACE_OID, f"synthetic-data:{args.seed}")
+        self.roles = parse_weights(args.roles, UserRoles)
+        self.token_types = parse_weights(args.token_types, TokenType)
+
+    def get_user_id(self, index: int) -> uuid.UUID:
+        return uuid.uuid5(self.namespace, str(index))
+
+    def get_past_datetime(self, max_days: float) -> datetime:
+        return self.now - timedelta(seconds=self.rng.uniform(0, max_days * 24 * 60 * 60))
+
+    def generate_users(self) -> Iterator[tuple[tuple, tuple | None]]:
+        """
+        Yield a users_user row per account, with a pending users_mfa_attempt row for a share of
+        the accounts with MFA enabled.
+        """
+        rng = self.rng
+        role_names, role_weights = list(self.roles), list(self.roles.values())
+        for index in range(self.args.users):
+            user_id = self.get_user_id(index)
+            is_mfa_enabled = rng.random() < self.args.mfa_ratio
+            created_at = self.get_past_datetime(max_days=self.args.account_age_max_days)
+            # Enum columns hold the member names
+            role = rng.choices(role_names, weights=role_weights)[0]
+            user = (
+                user_id,
+                f"user-{self.args.seed}-{index}@synthetic.example.com",
+                rng.choice(self.password_pool),
+                f"Synthetic User {index}",
+                rng.random() >= self.args.inactive_ratio,
+                is_mfa_enabled,
+                rng.random() < 0.95,
+                False,
+                None,
+                self.get_past_datetime(max_days=30) if rng.random() < 0.8 else None,
+                created_at,
+                created_at,
+                [role.name],
+            )
+
+            mfa_attempt = None
+            if is_mfa_enabled and rng.random() < self.args.pending_mfa_ratio:
+                mfa_attempt = (
+                    user_id,
+                    "".join(rng.choices(string.ascii_letters + string.digits, k=config.TOKEN_LENGTH)),
+                    self.now + timedelta(seconds=rng.uniform(0, config.TOKEN_EXPIRY_MINUTES * 60)),
+                    rng.randint(0, config.MAX_INVALID_ATTEMPTS - 1),
+                    rng.randint(0, config.MAX_TOKEN_REQUEST_ATTEMPTS - 1),
+                )
+
+            yield user, mfa_attempt
+
+    def generate_blacklisted_tokens(self) -> Iterator[tuple]:
+        """
+        Yield users_blacklisted_token rows, blacklisted at exponentially distributed ages with a
+        mean of `--token-age-mean-hours`, capped at `--token-age-max-days`.
+        """
+        rng = self.rng
+        type_names, type_weights = list(self.token_types), list(self.token_types.values())
+        mean_age_seconds = self.args.token_age_mean_hours * 60 * 60
+        max_age_seconds = self.args.token_age_max_days * 24 * 60 * 60
+        for _ in range(self.args.blacklisted_tokens):
+            age_seconds = min(rng.expovariate(1 / mean_age_seconds), max_age_seconds)
+            # Shaped like a signed JWT of the app, about as long
+            token = ".".join(
+                base64.urlsafe_b64encode(rng.randbytes(size)).decode().rstrip("=") for size in (27, 96, 32)
+            )
+            yield (
+                token,
+                rng.choices(type_names, weights=type_weights)[0].name,
+                self.now - timedelta(seconds=age_seconds),
+                self.get_user_id(rng.randrange(self.args.users)),
+            )
+
+
+def chunked(rows: Iterator, size: int) -> Iterator[list]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def copy_users(connection: asyncpg.Connection, generator: SyntheticDataGenerator, chunk_size: int) -> None:
+    copied_users = copied_attempts = 0
+    for chunk in chunked(generator.generate_users(), chunk_size):
+        users = [user for user, _ in chunk]
+        mfa_attempts = [mfa_attempt for _, mfa_attempt in chunk if mfa_attempt is not None]
+        await connection.copy_records_to_table(User.__tablename__, records=users, columns=USER_COLUMNS)
+        await connection.copy_records_to_table(
+            MFAAttempt.__tablename__, records=mfa_attempts, columns=MFA_ATTEMPT_COLUMNS
+        )
+        copied_users += len(users)
+        copied_attempts += len(mfa_attempts)
+        logger.info(f"Copied {copied_users} users and {copied_attempts} MFA attempts")
+
+
+async def copy_blacklisted_tokens(
+    connection: asyncpg.Connection, generator: SyntheticDataGenerator, chunk_size: int
+) -> None:
+    copied_tokens = 0
+    for chunk in chunked(generator.generate_blacklisted_tokens(), chunk_size):
+        await connection.copy_records_to_table(
+            BlacklistedToken.__tablename__, records=chunk, columns=BLACKLISTED_TOKEN_COLUMNS
+        )
+        copied_tokens += len(chunk)
+        logger.info(f"Copied {copied_tokens} blacklisted tokens")
+
+
+async def generate_synthetic_data(args: argparse.Namespace) -> int:
+    if config.ENVIRONMENT == Environment.PRODUCTION:
+        logger.error("Refusing to generate synthetic data in production")
+        return 1
+    if args.blacklisted_tokens and not args.users:
+        logger.error("Blacklisted tokens need at least one user to belong to")
+        return 1
+
+    now = datetime.fromisoformat(args.now) if args.now else datetime.now(timezone.utc)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    logger.info(f"Hashing a pool of {args.password_pool} passwords")
+    password_pool = [Password.get_hashed_password(f"synthetic-password-{index}") for index in range(args.password_pool)]
+    generator = SyntheticDataGenerator(args, now=now, password_pool=password_pool)
+
+    url = make_url(str(config.DB_URL)).set(drivername="postgresql")
+    connection = await asyncpg.connect(url.render_as_string(hide_password=False))
+    tables = [User.__tablename__, MFAAttempt.__tablename__, BlacklistedToken.__tablename__]
+    start_time = time.perf_counter()
+    try:
+        if args.truncate:
+            logger.info(f"Truncating {', '.join(tables)}")
+            await connection.execute(f"TRUNCATE {', '.join(tables)} RESTART IDENTITY CASCADE")
+
+        await copy_users(connection, generator, chunk_size=args.chunk_size)
+        await copy_blacklisted_tokens(connection, generator, chunk_size=args.chunk_size)
+
+        for table in tables:
+            await connection.execute(f"ANALYZE {table}")
+    finally:
+        await connection.close()
+
+    logger.info(f"Generated the synthetic data in {time.perf_counter() - start_time:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--blacklisted-tokens", type=int, default=2_000_000)
+    parser.add_argument(
+        "--roles", default="user=90,viewer=6,editor=3,admin=1", help="weights of the role assigned to each user"
+    )
+    parser.add_argument("--mfa-ratio", type=float, default=0.7, help="fraction of the users with MFA enabled")
+    parser.add_argument(
+        "--pending-mfa-ratio", type=float, default=0.02, help="fraction of the MFA users with a pending attempt"
+    )
+    parser.add_argument("--inactive-ratio", type=float, default=0.05, help="fraction of inactive users")
+    parser.add_argument("--account-age-max-days", type=float, default=3 * 365)
+    parser.add_argument(
+        "--token-types", default="refresh=90,reset_password=10", help="weights of the blacklisted token types"
+    )
+    parser.add_argument("--token-age-mean-hours", type=float, default=24, help="mean age of the blacklisted tokens")
+    parser.add_argument("--token-age-max-days", type=float, default=90, help="age of the oldest blacklisted tokens")
+    parser.add_argument("--password-pool", type=int, default=16, help="distinct passwords hashed for all users")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="rows per COPY")
+    parser.add_argument("--now", help="ISO timestamp the ages are relative to, for reproducible data")
+    parser.add_argument("--truncate", action="store_true", help="empty the tables first")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(generate_synthetic_data(args)))
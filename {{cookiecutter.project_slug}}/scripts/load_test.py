@@ -0,0 +1,330 @@
+"""
+End-to-end load test of the authentication hot paths, on one machine and without network access.
+
+The app (`src.main:app` under gunicorn) runs against local Postgres and Redis and a fake Cerbos
+gRPC server (scripts/fake_cerbos.py). Postgres and Redis are the containers of docker-compose or
+local processes. The test gets its own database (`<DB_NAME>_loadtest`) and Redis databases, which
+are reset on every run, so the development data is left alone. No worker runs, so the emails
+are only enqueued.
+
+Every virtual user logs in with its own account, with or without MFA (the code is read back from
+Redis), reads `/users/details/` a few times, refreshes its access token and logs out, in a loop.
+Throughput and p50/p95/p99 latency are reported per endpoint.
+
+    docker compose run --rm app python scripts/load_test.py --users 50 --duration 60 --output before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import asyncpg
+import httpx
+from sqlalchemy.engine import make_url
+
+LOAD_TEST_DB_SUFFIX = "_loadtest"
+LOAD_TEST_REDIS_DB = "14"
+LOAD_TEST_TASK_QUEUE_DB = "15"
+LOAD_TEST_PASSWORD = "load-test-password"
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def use_load_test_services(cerbos_port: int) -> None:
+    """
+    Point this process and the app it starts at the load test databases and the fake Cerbos,
+    before the config is loaded.
+    """
+    if os.environ.get("DB_URL"):
+        url = make_url(os.environ["DB_URL"])
+        database_url = url.set(database=f"{url.database}{LOAD_TEST_DB_SUFFIX}")
+        os.environ["DB_URL"] = database_url.render_as_string(hide_password=False)
+    else:
+        os.environ["DB_NAME"] = f"{os.environ.get('DB_NAME', '')}{LOAD_TEST_DB_SUFFIX}"
+    os.environ["DB_REPLICA_URLS"] = "[]"
+    os.environ["REDIS_DB"] = LOAD_TEST_REDIS_DB
+    os.environ["REDIS_TASK_QUEUE_DB"] = LOAD_TEST_TASK_QUEUE_DB
+    os.environ["CERBOS_URL"] = f"127.0.0.1:{cerbos_port}"
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="prometheus-")
+
+
+CERBOS_PORT = get_free_port()
+use_load_test_services(cerbos_port=CERBOS_PORT)
+
+from src.authentication.services.mfa_store import mfa_attempt_store  # noqa: E402
+from src.core.config import config  # noqa: E402
+from src.core.constants import UserRoles  # noqa: E402
+from src.core.helpers.redis import cache, task_queue  # noqa: E402
+from src.core.security.passwords import Password  # noqa: E402
+from src.database.base import Base  # noqa: E402
+from src.database.session import AsyncSessionLocal, async_engine  # noqa: E402
+from src.users.models import User  # noqa: E402
+
+
+class LatencyRecorder:
+    """
+    Collects the latency and outcome of every request per endpoint, ignoring the warmup.
+    """
+
+    def __init__(self, measure_from: float) -> None:
+        self.measure_from = measure_from
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    def record(self, endpoint: str, start_time: float, duration: float, ok: bool) -> None:
+        if start_time < self.measure_from:
+            return
+
+        self.latencies[endpoint].append(duration)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    @staticmethod
+    def get_percentiles(latencies: list[float]) -> dict:
+        if len(latencies) < 2:
+            latency = latencies[0] if latencies else 0
+            return {"p50": latency, "p95": latency, "p99": latency}
+
+        cut_points = statistics.quantiles(latencies, n=100, method="inclusive")
+        return {"p50": cut_points[49], "p95": cut_points[94], "p99": cut_points[98]}
+
+    def summarize(self, elapsed: float) -> dict:
+        endpoints = {}
+        for endpoint, latencies in sorted(self.latencies.items()):
+            percentiles = self.get_percentiles(latencies)
+            endpoints[endpoint] = {
+                "requests": len(latencies),
+                "errors": self.errors[endpoint],
+                "throughput": len(latencies) / elapsed,
+                **{name: round(value * 1000, 2) for name, value in percentiles.items()},
+                "max": round(max(latencies) * 1000, 2),
+            }
+
+        all_latencies = [latency for latencies in self.latencies.values() for latency in latencies]
+        return {
+            "duration_seconds": round(elapsed, 2),
+            "requests": len(all_latencies),
+            "errors": sum(self.errors.values()),
+            "throughput": len(all_latencies) / elapsed,
+            "endpoints": endpoints,
+        }
+
+
+def print_summary(summary: dict) -> None:
+    print(f"{'endpoint':<24} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for endpoint, stats in summary["endpoints"].items():
+        print(
+            f"{endpoint:<24} {stats['requests']:>9} {stats['errors']:>7} {stats['throughput']:>9.1f} "
+            f"{stats['p50']:>9.2f} {stats['p95']:>9.2f} {stats['p99']:>9.2f}"
+        )
+    print(
+        f"{'total':<24} {summary['requests']:>9} {summary['errors']:>7} {summary['throughput']:>9.1f}"
+        f"  in {summary['duration_seconds']}s"
+    )
+
+
+async def prepare_database(users: int, mfa_ratio: float) -> list[User]:
+    """
+    Create the load test database if needed, recreate its tables and add one account per
+    virtual user, the first `mfa_ratio` of them with MFA enabled.
+    """
+    url = make_url(str(config.DB_URL))
+    connection = await asyncpg.connect(
+        user=url.username, password=url.password, host=url.host, port=url.port, database="postgres"
+    )
+    try:
+        if not await connection.fetchval("SELECT 1 FROM pg_database WHERE datname = $1", url.database):
+            await connection.execute(f'CREATE DATABASE "{url.database}"')
+    finally:
+        await connection.close()
+
+    async with async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+
+    # Hashed once, every account shares the password
+    hashed_password = Password.get_hashed_password(LOAD_TEST_PASSWORD)
+    mfa_users = round(users * mfa_ratio)
+    accounts = [
+        User(
+            email=f"load-test-{index}@example.com",
+            password=hashed_password,
+            full_name=f"Load Test {index}",
+            is_active=True,
+            is_mfa_enabled=index < mfa_users,
+            email_verified=True,
+            assigned_roles=[UserRoles.USER],
+        )
+        for index in range(users)
+    ]
+    async with AsyncSessionLocal() as session:
+        session.add_all(accounts)
+        await session.commit()
+
+    return accounts
+
+
+def start_process(command: list[str], log_file) -> subprocess.Popen:
+    return subprocess.Popen(command, stdout=log_file, stderr=subprocess.STDOUT, env=os.environ.copy())
+
+
+def stop_process(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def wait_until_ready(base_url: str, app: subprocess.Popen, timeout_seconds: float = 60) -> None:
+    deadline = time.perf_counter() + timeout_seconds
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.perf_counter() < deadline:
+            if app.poll() is not None:
+                raise RuntimeError(f"The app exited with code {app.returncode}, see its log")
+            try:
+                if (await client.get(f"{config.API_PREFIX}/health/app/")).is_success:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+
+    raise RuntimeError(f"The app didn't answer within {timeout_seconds}s, see its log")
+
+
+class VirtualUser:
+    """
+    Loops over a whole session of one account: login (and MFA), profile reads, refresh and logout.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, recorder: LatencyRecorder, account: User, reads: int) -> None:
+        self.client = client
+        self.recorder = recorder
+        self.account = account
+        self.reads = reads
+
+    async def request(self, endpoint: str, method: str, url: str, **kwargs) -> dict | None:
+        start_time = time.perf_counter()
+        try:
+            response = await self.client.request(method, f"{config.API_PREFIX}{url}", **kwargs)
+            ok = response.is_success
+        except httpx.HTTPError:
+            ok = False
+        self.recorder.record(endpoint, start_time, time.perf_counter() - start_time, ok)
+
+        return response.json()["data"] if ok else None
+
+    async def login(self) -> dict | None:
+        credentials = {"email": self.account.email, "password": LOAD_TEST_PASSWORD}
+        if not self.account.is_mfa_enabled:
+            return await self.request("auth/login", "POST", "/auth/login/", json=credentials)
+
+        if await self.request("auth/login (mfa)", "POST", "/auth/login/", json=credentials) is None:
+            return None
+
+        code = cache.hget(mfa_attempt_store.get_key(self.account.id), "code")
+        if code is None:
+            return None
+
+        token_data = {"email": self.account.email, "token": code.decode()}
+        return await self.request("auth/verify-token", "POST", "/auth/verify-token/", json=token_data)
+
+    async def run(self, deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            tokens = await self.login()
+            if tokens is None:
+                # Don't spin on a failing login
+                await asyncio.sleep(0.1)
+                continue
+
+            headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+            refresh_token_data = {"refresh_token": tokens["refresh_token"]}
+            for _ in range(self.reads):
+                await self.request("users/details", "GET", "/users/details/", headers=headers)
+            await self.request("auth/refresh", "POST", "/auth/refresh/", json=refresh_token_data, headers=headers)
+            await self.request("auth/logout", "POST", "/auth/logout/", json=refresh_token_data, headers=headers)
+
+
+async def run_load_test(args: argparse.Namespace) -> int:
+    accounts = await prepare_database(users=args.users, mfa_ratio=args.mfa_ratio)
+    cache.flushdb()
+    task_queue.flushdb()
+
+    app_port = get_free_port()
+    base_url = f"http://127.0.0.1:{app_port}"
+    log_file = open(args.app_log, "w")
+    cerbos_command = ["scripts/fake_cerbos.py", "--port", str(CERBOS_PORT), "--latency-ms", str(args.cerbos_latency_ms)]
+    cerbos = start_process([sys.executable, *cerbos_command], log_file)
+    app_command = [
+        "src.main:app",
+        "--workers",
+        str(args.workers),
+        "--worker-class",
+        "uvicorn.workers.UvicornWorker",
+        "--bind",
+        f"127.0.0.1:{app_port}",
+    ]
+    app = start_process([sys.executable, "-m", "gunicorn", *app_command], log_file)
+    try:
+        await wait_until_ready(base_url, app)
+
+        limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            start_time = time.perf_counter()
+            recorder = LatencyRecorder(measure_from=start_time + args.warmup)
+            deadline = start_time + args.warmup + args.duration
+            await asyncio.gather(
+                *(VirtualUser(client, recorder, account, reads=args.reads).run(deadline) for account in accounts)
+            )
+            # Sessions still running at the deadline are finished, so measure up to now
+            summary = recorder.summarize(elapsed=time.perf_counter() - recorder.measure_from)
+    finally:
+        stop_process(app)
+        stop_process(cerbos)
+        log_file.close()
+        cache.flushdb()
+        task_queue.flushdb()
+        await async_engine.dispose()
+
+    summary["settings"] = {
+        "users": args.users,
+        "mfa_ratio": args.mfa_ratio,
+        "workers": args.workers,
+        "reads": args.reads,
+        "cerbos_latency_ms": args.cerbos_latency_ms,
+    }
+    print_summary(summary)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users, each with its own account")
+    parser.add_argument("--mfa-ratio", type=float, default=0.2, help="fraction of the accounts with MFA enabled")
+    parser.add_argument("--duration", type=float, default=30, help="seconds measured after the warmup")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds of load before measuring")
+    parser.add_argument("--reads", type=int, default=5, help="/users/details/ reads per session")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers of the app")
+    parser.add_argument("--cerbos-latency-ms", type=float, default=0, help="delay added by the fake Cerbos")
+    parser.add_argument("--app-log", default=os.path.join(tempfile.gettempdir(), "load-test-app.log"))
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(run_load_test(args)))
@@ -0,0 +1,255 @@
+"""
+Microbenchmarks of the functions every request goes through, with JSON baselines.
+
+Each benchmark is calibrated so a round lasts at least `--min-round-ms`, then timed over
+`--rounds` rounds. The per-call min, median, mean and standard deviation are stored as JSON, and
+two result files can be compared to flag regressions beyond a threshold. Redis has to be
+reachable since the app's helpers connect on import. Nothing else is called over the network.
+
+    python scripts/microbenchmarks.py run --output .benchmarks/baseline.json
+    python scripts/microbenchmarks.py run --output .benchmarks/latest.json
+    python scripts/microbenchmarks.py compare .benchmarks/baseline.json .benchmarks/latest.json --threshold 10
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable
+
+from fastapi import HTTPException, status
+from loguru import logger
+
+from src.authentication.services.mfa import MFAHelper
+from src.core.constants import ResourceActions, UserRoles
+from src.core.exception_handlers.http import http_exception_handler
+from src.core.permissions.dependencies import PermissionChecker
+from src.core.responses.default import DefaultResponse
+from src.core.security.tokens import Tokens
+from src.notifications.email.mfa.mfa import MFAEmail
+from src.users.models import User
+
+# Every benchmark sets up its inputs and returns the callable that is timed
+BENCHMARKS: dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def benchmark(name: str):
+    def register(setup: Callable[[], Callable[[], object]]):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def get_user() -> User:
+    return User(
+        id=uuid.uuid4(),
+        email="benchmark@example.com",
+        password="hashed-password",
+        full_name="Benchmark User",
+        is_active=True,
+        is_mfa_enabled=False,
+        email_verified=True,
+        is_blocked=False,
+        last_login=datetime.now(timezone.utc),
+        created_at=datetime.now(timezone.utc),
+        updated_at=datetime.now(timezone.utc),
+        assigned_roles=[UserRoles.USER],
+    )
+
+
+def run_coroutine(coroutine):
+    # The benchmarked coroutines never suspend, so they run to completion without an event loop
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("The coroutine suspended, it needs an event loop")
+
+
+@benchmark("tokens.create_access_token")
+def bench_create_access_token():
+    data = {"user_id": str(uuid.uuid4())}
+    return lambda: Tokens.create_access_token(data=data)
+
+
+@benchmark("tokens.verify_token")
+def bench_verify_token():
+    token = Tokens.create_access_token(data={"user_id": str(uuid.uuid4())})
+    return lambda: Tokens.verify_token(token=token)
+
+
+@benchmark("responses.default_response")
+def bench_default_response():
+    content = get_user().json(exclude={"password"})
+    return lambda: DefaultResponse(content=content)
+
+
+@benchmark("exception_handlers.http_exception_handler")
+def bench_http_exception_handler():
+    exc = HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You are not authorized to perform this action.")
+    return lambda: run_coroutine(http_exception_handler(None, exc))
+
+
+@benchmark("permissions.get_principal")
+def bench_get_principal():
+    checker = PermissionChecker(action=ResourceActions.GET, resource_kind="users")
+    user = get_user()
+    return lambda: checker.get_principal(user=user)
+
+
+@benchmark("permissions.get_resource")
+def bench_get_resource():
+    checker = PermissionChecker(action=ResourceActions.GET, resource_kind="users")
+    user = get_user()
+    return lambda: checker.get_resource(user=user)
+
+
+@benchmark("models.user_json")
+def bench_user_json():
+    user = get_user()
+    return lambda: user.json(exclude={"password"})
+
+
+@benchmark("email.render_template")
+def bench_render_template():
+    email = MFAEmail()
+    template = email.get_template()
+    body_config = {"token": "Ab3dE6"}
+    return lambda: email.render_template(template, body_config)
+
+
+@benchmark("mfa.generate_random_token")
+def bench_generate_random_token():
+    return MFAHelper.generate_random_token
+
+
+def measure(func: Callable[[], object], rounds: int, min_round_seconds: float) -> dict:
+    """
+    Time the callable, in seconds per call.
+
+    Args:
+        func (Callable[[], object]): The callable to time.
+        rounds (int): Number of timed rounds.
+        min_round_seconds (float): Minimum duration of a round, sets the calls per round.
+
+    Returns:
+        dict: Per-call statistics over the rounds, with the calls per round.
+    """
+    iterations = 1
+    while True:
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        if time.perf_counter() - start_time >= min_round_seconds:
+            break
+        iterations *= 2
+
+    timings = []
+    for _ in range(rounds):
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        timings.append((time.perf_counter() - start_time) / iterations)
+
+    mean = statistics.mean(timings)
+    return {
+        "min": min(timings),
+        "max": max(timings),
+        "mean": mean,
+        "median": statistics.median(timings),
+        "stddev": statistics.stdev(timings) if len(timings) > 1 else 0,
+        "ops": 1 / mean,
+        "rounds": rounds,
+        "iterations": iterations,
+    }
+
+
+def format_duration(seconds: float) -> str:
+    return f"{seconds * 1_000_000:>10.2f} us"
+
+
+def run_benchmarks(args: argparse.Namespace) -> int:
+    # The rendering and validation logs would be timed with the functions
+    logger.disable("src")
+
+    results = []
+    for name, setup in BENCHMARKS.items():
+        if args.filter and not re.search(args.filter, name):
+            continue
+
+        stats = measure(setup(), rounds=args.rounds, min_round_seconds=args.min_round_ms / 1000)
+        results.append({"name": name, "stats": stats})
+        print(f"{name:<45} median {format_duration(stats['median'])}  stddev {format_duration(stats['stddev'])}")
+
+    output = {
+        "machine_info": {
+            "python_version": platform.python_version(),
+            "python_implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "system": platform.system(),
+            "cpu_count": os.cpu_count(),
+        },
+        "datetime": datetime.now(timezone.utc).isoformat(),
+        "benchmarks": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"Saved {len(results)} results to {args.output}")
+
+    return 0
+
+
+def compare_benchmarks(args: argparse.Namespace) -> int:
+    with open(args.baseline) as f:
+        baseline = {result["name"]: result["stats"] for result in json.load(f)["benchmarks"]}
+    with open(args.current) as f:
+        current = {result["name"]: result["stats"] for result in json.load(f)["benchmarks"]}
+
+    regressions = 0
+    print(f"{'benchmark':<45} {'baseline':>13} {'current':>13} {'change':>9}")
+    for name, stats in current.items():
+        if name not in baseline:
+            print(f"{name:<45} {'-':>13} {format_duration(stats[args.metric])} {'new':>9}")
+            continue
+
+        change = (stats[args.metric] - baseline[name][args.metric]) / baseline[name][args.metric] * 100
+        flag = ""
+        if change > args.threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(
+            f"{name:<45} {format_duration(baseline[name][args.metric])} "
+            f"{format_duration(stats[args.metric])} {change:>+8.1f}%{flag}"
+        )
+
+    if regressions:
+        print(f"{regressions} benchmarks regressed by more than {args.threshold}% ({args.metric})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmarks and save the results")
+    run_parser.add_argument("--output", default=".benchmarks/latest.json")
+    run_parser.add_argument("--filter", help="only run the benchmarks matching this regular expression")
+    run_parser.add_argument("--rounds", type=int, default=20)
+    run_parser.add_argument("--min-round-ms", type=float, default=20)
+
+    compare_parser = subparsers.add_parser("compare", help="flag regressions between two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=10, help="allowed slowdown in percent")
+    compare_parser.add_argument("--metric", choices=["min", "median", "mean"], default="median")
+    args = parser.parse_args()
+
+    sys.exit(run_benchmarks(args) if args.command == "run" else compare_benchmarks(args))
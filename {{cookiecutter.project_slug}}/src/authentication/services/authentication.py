@@ -66,7 +66,7 @@ class AuthenticationHelper:
 class AuthenticationService(AuthenticationHelper):
     @classmethod
     async def login(cls, db: AsyncSession, email: str, password: str) -> User:
-        user = await crud_user.get_by_filters(db, filters=[User.email == email])
+        user = await crud_user.get_by_email(db, email=email)
         if not user:
             raise InvalidCredentialsException()
 
@@ -83,9 +83,7 @@ class AuthenticationService(AuthenticationHelper):
             raise UserInactiveOrBlockedException()
 
         if not user.is_mfa_enabled:
-            user.last_login = datetime.now(timezone.utc)
-            await crud_user.update_obj(db, obj=user)
-            await db.commit()
+            crud_user.update_obj_deferred(user, last_login=datetime.now(timezone.utc))
             return cls.generate_tokens(user=user)
 
         # Generate mfa attempt
@@ -94,15 +92,12 @@ class AuthenticationService(AuthenticationHelper):
 
     @classmethod
     async def verify_token(cls, db: AsyncSession, email: str, token: str) -> dict:
-        user = await crud_user.get_by_filters(db, filters=[User.email == email])
+        user = await crud_user.get_by_email(db, email=email)
         if not user:
             raise InvalidCredentialsException()
 
-        MFAService.verify_token(db, user=user, token=token)
-        user.last_login = datetime.now(timezone.utc)
-        user.active_mfa_attempt = None
-        await crud_user.update_obj(db, obj=user)
-        await db.commit()
+        await MFAService.verify_token(db, user=user, token=token)
+        crud_user.update_obj_deferred(user, last_login=datetime.now(timezone.utc))
 
         return cls.generate_tokens(user=user)
 
@@ -117,7 +112,7 @@ class AuthenticationService(AuthenticationHelper):
     @classmethod
     async def init_reset_password(cls, db: AsyncSession, email: str) -> dict:
         # TODO: Need to allow initialization of reset password only once
-        user = await crud_user.get_by_filters(db, filters=[User.email == email])
+        user = await crud_user.get_by_email(db, email=email)
         if user:
             reset_password_link = cls.generate_reset_password_link(user=user)
             ResetPasswordEmail.send_email(email_to=user.email, body_config={"reset_password_url": reset_password_link})
@@ -128,7 +123,7 @@ class AuthenticationService(AuthenticationHelper):
 
     @classmethod
     async def reset_password(cls, db: AsyncSession, token: str, email: str, password: str) -> dict:
-        user = await crud_user.get_by_filters(db, filters=[User.email == email])
+        user = await crud_user.get_by_email(db, email=email)
         if not user:
             raise UserNotFoundException()
 
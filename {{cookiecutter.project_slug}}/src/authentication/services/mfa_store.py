@@ -0,0 +1,117 @@
+from enum import IntEnum
+from uuid import UUID
+
+import redis
+
+from src.core.config import config
+from src.core.helpers.redis import cache
+
+# KEYS[1]: attempt hash, ARGV[1]: code, ARGV[2]: ttl in seconds, ARGV[3]: max codes per attempt window
+# Returns the number of codes issued before this one, or -1 when the limit is exceeded
+ISSUE_ATTEMPT_SCRIPT = """
+local resend_count = redis.call('HINCRBY', KEYS[1], 'resend_count', 1) - 1
+if resend_count >= tonumber(ARGV[3]) then
+    redis.call('DEL', KEYS[1])
+    return -1
+end
+redis.call('HSET', KEYS[1], 'code', ARGV[1])
+redis.call('HSETNX', KEYS[1], 'incorrect_attempts_count', 0)
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return resend_count
+"""
+
+# KEYS[1]: attempt hash, ARGV[1]: submitted code, ARGV[2]: max invalid attempts
+# Returns an MFAVerificationResult
+VERIFY_ATTEMPT_SCRIPT = """
+local code = redis.call('HGET', KEYS[1], 'code')
+if not code then
+    return -1
+end
+if code == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+local incorrect_attempts_count = redis.call('HINCRBY', KEYS[1], 'incorrect_attempts_count', 1)
+if incorrect_attempts_count >= tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1])
+    return -2
+end
+return 0
+"""
+
+
+class MFAVerificationResult(IntEnum):
+    """
+    An enumeration representing the outcome of verifying an MFA code.
+    Attributes:
+        NOT_GENERATED: No code was issued or the issued code expired.
+        BLOCKED: The code was wrong and the maximum number of invalid attempts was reached.
+        INVALID: The code was wrong.
+        VALID: The code matched and the attempt was consumed.
+    """
+
+    NOT_GENERATED = -1
+    BLOCKED = -2
+    INVALID = 0
+    VALID = 1
+
+
+class MFAAttemptStore:
+    """
+    Keeps pending MFA attempts in Redis hashes that expire after `TOKEN_EXPIRY_MINUTES`.
+    Counters are incremented and checked atomically by Lua scripts.
+    """
+
+    key_prefix = "mfa:attempt"
+
+    def __init__(self, client: redis.Redis) -> None:
+        self.client = client
+        self.issue_attempt_script = client.register_script(ISSUE_ATTEMPT_SCRIPT)
+        self.verify_attempt_script = client.register_script(VERIFY_ATTEMPT_SCRIPT)
+
+    def get_key(self, user_id: UUID) -> str:
+        return f"{self.key_prefix}:{user_id}"
+
+    def issue(self, user_id: UUID, code: str) -> int | None:
+        """
+        Store a new code for the user, keeping the counters of the current attempt window.
+
+        Args:
+            user_id (UUID): Id of the user the code is issued to.
+            code (str): The generated code.
+
+        Returns:
+            int | None: Number of codes issued before this one, or None when the user requested
+                more than `MAX_TOKEN_REQUEST_ATTEMPTS` codes and the attempt was dropped.
+        """
+        resend_count = self.issue_attempt_script(
+            keys=[self.get_key(user_id)],
+            args=[code, config.TOKEN_EXPIRY_MINUTES * 60, config.MAX_TOKEN_REQUEST_ATTEMPTS],
+        )
+
+        return None if resend_count < 0 else resend_count
+
+    def verify(self, user_id: UUID, code: str) -> MFAVerificationResult:
+        """
+        Check the submitted code, consuming the attempt when it matches or when the maximum
+        number of invalid attempts is reached.
+
+        Args:
+            user_id (UUID): Id of the user submitting the code.
+            code (str): The submitted code.
+
+        Returns:
+            MFAVerificationResult: The outcome of the check.
+        """
+        result = self.verify_attempt_script(
+            keys=[self.get_key(user_id)],
+            args=[code, config.MAX_INVALID_ATTEMPTS],
+        )
+
+        return MFAVerificationResult(result)
+
+    def reset(self, user_id: UUID) -> None:
+        self.client.delete(self.get_key(user_id))
+
+
+mfa_attempt_store = MFAAttemptStore(client=cache)
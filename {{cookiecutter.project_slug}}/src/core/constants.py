@@ -26,11 +26,13 @@ class TokenType(str, Enum):
         ACCESS: Represents an access token used for authentication and authorization.
         REFRESH: Represents a refresh token used to obtain new access tokens.
         RESET_PASSWORD: Represents a token used to reset the password of a user.
+        PROFILING: Represents a token issued to an admin to profile the requests sent with it.
     """
 
     ACCESS = "access"
     REFRESH = "refresh"
     RESET_PASSWORD = "reset_password"
+    PROFILING = "profiling"
 
 
 class UserRoles(str, Enum):
@@ -63,3 +65,45 @@ class ResourceActions(str, Enum):
     CREATE = "create"
     UPDATE = "update"
     DELETE = "delete"
+
+
+class TaskQueue(str, Enum):
+    """
+    An enumeration representing the background job queues, in the order workers pick them up.
+    Attributes:
+        CRITICAL: Jobs a user is waiting on, e.g. login verification codes and reset password emails.
+        DEFAULT: Regular jobs.
+        BULK: Large or slow jobs that can wait, e.g. batched emails and cache preloads.
+    """
+
+    CRITICAL = "critical"
+    DEFAULT = "default"
+    BULK = "bulk"
+
+
+class JobOutcome(str, Enum):
+    """
+    An enumeration representing how a run of a background job ended.
+    Attributes:
+        SUCCEEDED: The job returned.
+        FAILED: The job raised and has no retries left.
+        RETRIED: The job raised and was requeued or scheduled for another attempt.
+    """
+
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    RETRIED = "retried"
+
+
+class TracingExporter(str, Enum):
+    """
+    An enumeration representing where the tracing spans are exported.
+    Attributes:
+        NONE: Tracing is disabled.
+        OTLP: Spans are sent to an OpenTelemetry collector over OTLP/HTTP, e.g. a local Jaeger.
+        FILE: Spans are appended to a file as JSON lines, for offline inspection.
+    """
+
+    NONE = "none"
+    OTLP = "otlp"
+    FILE = "file"
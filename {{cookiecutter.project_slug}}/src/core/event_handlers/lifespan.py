@@ -5,28 +5,48 @@ from loguru import logger
 from rq.exceptions import NoSuchJobError
 from rq.job import Job, JobStatus
 
+from src.core.helpers.loop_monitor import loop_lag_monitor
+from src.core.helpers.memory import memory_sampler
 from src.core.helpers.redis import task_queue
-from src.core.helpers.rq import queue
+from src.core.helpers.rq import get_queue, record_enqueued
+from src.core.helpers.tracing import tracing
+from src.database.write_behind import write_behind_buffer
+from src.notifications.email.registry import email_template_registry
 from src.users.jobs.preload_blacklisted_tokens import PreloadBlacklistedTokens
 
 preload_config = [
     {
         "job_id": "preload_blacklisted_tokens_on_startup",
         "fn": PreloadBlacklistedTokens().run,
+        "queue_name": PreloadBlacklistedTokens.queue_name,
     },
 ]
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    tracing.setup(component="app")
+
     for config in preload_config:
         try:
             job = Job.fetch(id=config["job_id"], connection=task_queue)
             if job.get_status() == JobStatus.FAILED:
                 logger.info(f"Preloading {config['job_id']} on startup because previous job failed")
-                queue.enqueue(config["fn"], job_id=config["job_id"])
+                record_enqueued([get_queue(config["queue_name"]).enqueue(config["fn"], job_id=config["job_id"])])
         except NoSuchJobError:
             logger.info(f"Preloading {config['job_id']} on startup")
-            queue.enqueue(config["fn"], job_id=config["job_id"])
+            record_enqueued([get_queue(config["queue_name"]).enqueue(config["fn"], job_id=config["job_id"])])
+
+    # Compile the email templates before the first request needs them
+    email_template_registry.discover()
+    write_behind_buffer.start()
+    memory_sampler.start()
+    loop_lag_monitor.start()
 
     yield
+
+    loop_lag_monitor.stop()
+    memory_sampler.stop()
+    # Write the buffered non-critical updates before the worker exits
+    await write_behind_buffer.stop()
+    tracing.shutdown()
@@ -0,0 +1,216 @@
+"""
+Asyncio worker for I/O-bound jobs, run next to or instead of the rq workers:
+
+    python -m src.core.helpers.async_worker default bulk --concurrency 32
+"""
+
+import argparse
+import asyncio
+import signal
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+from rq import Queue
+from rq.exceptions import DequeueTimeout
+from rq.job import Job
+from rq.timeouts import BaseDeathPenalty, JobTimeoutException
+
+from src.core.config import config
+from src.core.constants import TaskQueue
+from src.core.helpers.redis import task_queue
+from src.core.helpers.rq import LatencyTrackingWorker, get_queue
+from src.core.helpers.tracing import tracing
+
+
+class LoopJob(Job):
+    """
+    Job whose coroutine runs on the asyncio worker's event loop, where it shares the database
+    engine's connection pool, instead of on a new event loop per job like rq does. The coroutine
+    is cancelled on the loop once it runs past the job's timeout.
+    """
+
+    loop: asyncio.AbstractEventLoop | None = None
+
+    async def run_with_timeout(self, coroutine):
+        timeout = self.timeout if self.timeout and self.timeout > 0 else None
+        deadline = asyncio.timeout(timeout)
+        try:
+            async with deadline:
+                return await coroutine
+        except TimeoutError:
+            # A TimeoutError raised by the job itself is left as it is
+            if deadline.expired():
+                raise JobTimeoutException(f"Task exceeded maximum timeout value ({timeout} seconds)") from None
+            raise
+
+    def _execute(self):
+        result = self.func(*self.args, **self.kwargs)
+        if not asyncio.iscoroutine(result):
+            return result
+
+        return asyncio.run_coroutine_threadsafe(self.run_with_timeout(result), self.loop).result()
+
+
+class LoopDeathPenalty(BaseDeathPenalty):
+    """
+    rq's default timeout relies on SIGALRM, which only works in the main thread. Coroutine jobs
+    time out on the event loop instead, and a thread running a blocking job can't be interrupted.
+    """
+
+    def setup_death_penalty(self):
+        pass
+
+    def cancel_death_penalty(self):
+        pass
+
+
+class AsyncSlotWorker(LatencyTrackingWorker):
+    """
+    rq worker of one slot of the `AsyncWorker`. Jobs go through rq's own flow in a thread:
+    the execution in the started registry, callbacks, `Retry` results and the failed registry.
+    """
+
+    job_class = LoopJob
+    death_penalty_class = LoopDeathPenalty
+    new_event_loop_per_job = False
+
+
+class AsyncWorker:
+    """
+    Runs jobs from the rq queues concurrently on a single event loop.
+
+    Coroutine jobs, e.g. `PreloadBlacklistedTokens().run`, are awaited on the loop, so they share
+    the database engine's connection pool instead of getting a fresh event loop and pool per job.
+    Blocking jobs, e.g. `SendEmail().run`, run in a thread pool and share the SMTP and SES
+    clients of the process. At most `concurrency` jobs run at a time.
+
+    The worker registers one rq worker per concurrent job, named `<name>-<slot>`, and each job
+    is run by the worker of a free slot with rq's own job flow, so jobs, results and registries
+    look the same as with the rq workers, and the dashboard shows every running job and the busy
+    or idle state of every slot. Scheduled jobs still need an rq worker started with
+    `--with-scheduler`.
+    """
+
+    dequeue_timeout_seconds = 2
+    heartbeat_interval_seconds = 30
+
+    def __init__(self, queues: list[Queue], concurrency: int) -> None:
+        self.queues = queues
+        self.concurrency = concurrency
+        self.name = f"async-{uuid.uuid4().hex[:12]}"
+        self.slot_workers = [
+            AsyncSlotWorker(self.queues, connection=task_queue, name=f"{self.name}-{slot}")
+            for slot in range(concurrency)
+        ]
+        self.running: dict[str, tuple[AsyncSlotWorker, Job]] = {}
+        self.tasks: set[asyncio.Task] = set()
+        self.stopping = False
+
+    def stop(self) -> None:
+        logger.info(f"[{self.name}] Stopping after {len(self.tasks)} running jobs finish")
+        self.stopping = True
+
+    def dequeue(self) -> tuple[Job, Queue] | None:
+        try:
+            return Queue.dequeue_any(
+                self.queues, timeout=self.dequeue_timeout_seconds, connection=task_queue, job_class=LoopJob
+            )
+        except DequeueTimeout:
+            return None
+
+    async def perform_job(
+        self, job: LoopJob, queue: Queue, worker: AsyncSlotWorker, idle_workers: asyncio.Queue
+    ) -> None:
+        job.loop = asyncio.get_running_loop()
+        self.running[worker.name] = (worker, job)
+        try:
+            # Failures of the job itself are handled by rq, this only raises on e.g. Redis errors
+            await asyncio.to_thread(worker.execute_job, job, queue)
+        except Exception:
+            logger.exception(f"[{worker.name}] Failed to run job {job.id}")
+        finally:
+            self.running.pop(worker.name, None)
+            idle_workers.put_nowait(worker)
+
+    def heartbeat(self, running: list[tuple[AsyncSlotWorker, Job]]) -> None:
+        # Renews the slot workers, and the executions of the running jobs in the started registry
+        with task_queue.pipeline() as pipeline:
+            for worker in self.slot_workers:
+                worker.heartbeat(pipeline=pipeline)
+            for worker, job in running:
+                if (execution := worker.execution) is not None:
+                    execution.heartbeat(job.started_job_registry, worker.get_heartbeat_ttl(job), pipeline=pipeline)
+            pipeline.execute()
+
+    async def send_heartbeats(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval_seconds)
+            # Copied on the loop, which adds and removes the running jobs
+            await asyncio.to_thread(self.heartbeat, list(self.running.values()))
+
+    async def close_pools(self) -> None:
+        from src.core.helpers.smtp import smtp_connection_pool
+        from src.database.session import async_engine, replica_engines
+
+        smtp_connection_pool.close_all()
+        for engine in [async_engine, *replica_engines]:
+            await engine.dispose()
+
+    async def run(self) -> None:
+        from src.notifications.email.registry import email_template_registry
+
+        tracing.setup(component="worker")
+        loop = asyncio.get_running_loop()
+        # Every running job holds a thread, plus a spare one for the dequeues and heartbeats
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.concurrency + 1))
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signal_number, self.stop)
+
+        # Compile the email templates once, before email jobs start running in threads
+        email_template_registry.discover()
+
+        idle_workers = asyncio.Queue()
+        for worker in self.slot_workers:
+            worker.register_birth()
+            idle_workers.put_nowait(worker)
+        heartbeat_task = asyncio.create_task(self.send_heartbeats())
+        logger.info(
+            f"[{self.name}] Listening on {', '.join(queue.name for queue in self.queues)} "
+            f"with up to {self.concurrency} concurrent jobs"
+        )
+
+        try:
+            while not self.stopping:
+                worker = await idle_workers.get()
+                dequeued = await asyncio.to_thread(self.dequeue)
+                if dequeued is None:
+                    idle_workers.put_nowait(worker)
+                    continue
+
+                task = asyncio.create_task(self.perform_job(*dequeued, worker, idle_workers))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+        finally:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+            heartbeat_task.cancel()
+            await self.close_pools()
+            for worker in self.slot_workers:
+                worker.register_death()
+            tracing.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "queues",
+        nargs="*",
+        type=TaskQueue,
+        default=list(TaskQueue),
+        help="Queues to listen on, in priority order. Defaults to every queue.",
+    )
+    parser.add_argument("--concurrency", type=int, default=config.ASYNC_WORKER_CONCURRENCY)
+    args = parser.parse_args()
+
+    queues = [get_queue(name) for name in args.queues]
+    asyncio.run(AsyncWorker(queues=queues, concurrency=args.concurrency).run())
@@ -0,0 +1,233 @@
+import base64
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.base import MIMEBase
+
+from loguru import logger
+
+from src.core.config import config
+from src.core.helpers.s3 import S3Helper
+
+# Base64 turns every 57 bytes into one 76 character line, so reading multiples of 57 bytes
+# lets the chunks be encoded independently and joined
+ENCODE_CHUNK_SIZE = 57 * 1024
+
+
+class AttachmentTooLargeException(ValueError):
+    """Raised when the attachments of a single email exceed `EMAIL_MAX_ATTACHMENTS_BYTES`."""
+
+
+class AttachmentCache:
+    """
+    Local on-disk cache of S3 attachments, addressed by the object's URI and ETag.
+
+    An object is downloaded once per content version and shared by every email that attaches it,
+    e.g. a report sent to 1,000 recipients. The least recently used files are evicted once the
+    cache grows beyond `max_bytes`. ETags and sizes are remembered for `etag_ttl_seconds`, so a
+    batch of emails doesn't check S3 for every single email either.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, download_concurrency: int, etag_ttl_seconds: int) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.download_concurrency = download_concurrency
+        self.etag_ttl_seconds = etag_ttl_seconds
+        self.objects: dict[str, tuple[str, int, float]] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.downloads = 0
+
+    def get_object_info(self, s3_helper: S3Helper, s3_uri: str) -> tuple[str, int]:
+        """
+        Returns:
+            tuple[str, int]: The ETag and size in bytes of the object's current version.
+        """
+        etag, size, fetched_at = self.objects.get(s3_uri, (None, 0, 0.0))
+        if etag is None or time.monotonic() - fetched_at > self.etag_ttl_seconds:
+            response = s3_helper.head_object(s3_uri)
+            etag, size = response["ETag"].strip('"'), response["ContentLength"]
+            self.objects[s3_uri] = (etag, size, time.monotonic())
+
+        return etag, size
+
+    def get_sizes(self, s3_uris: list[str]) -> dict[str, int]:
+        """
+        Get the size of the objects without downloading them.
+
+        Args:
+            s3_uris (list[str]): URIs of the objects.
+
+        Returns:
+            dict[str, int]: Size in bytes of every object, keyed by its URI.
+        """
+        s3_helper = S3Helper()
+        return {s3_uri: self.get_object_info(s3_helper, s3_uri)[1] for s3_uri in dict.fromkeys(s3_uris)}
+
+    def get_cache_file_name(self, s3_uri: str, etag: str) -> str:
+        return hashlib.sha256(f"{s3_uri}:{etag}".encode("utf-8")).hexdigest()
+
+    def fetch(self, s3_uri: str) -> str:
+        """
+        Return the local path of the object, downloading it unless the current version is cached.
+
+        Args:
+            s3_uri (str): URI of the object.
+
+        Returns:
+            str: Path of the cached file.
+        """
+        s3_helper = S3Helper()
+        etag, _ = self.get_object_info(s3_helper, s3_uri)
+        file_name = self.get_cache_file_name(s3_uri, etag)
+        file_path = os.path.join(self.cache_dir, file_name)
+
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            pass
+        else:
+            # Refresh only the access time for the LRU eviction, encoded payloads are keyed on the mtime
+            os.utime(file_path, (time.time(), stat.st_mtime))
+            with self.lock:
+                self.hits += 1
+            return file_path
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Download under a unique name and rename, so readers never see a partial file
+        temp_file_name = f"{file_name}.{os.getpid()}.{threading.get_ident()}.part"
+        temp_file_path = s3_helper.download_file(self.cache_dir, s3_uri, file_name=temp_file_name)
+        os.replace(temp_file_path, file_path)
+        with self.lock:
+            self.downloads += 1
+
+        self.evict(keep=file_path)
+        return file_path
+
+    def fetch_many(self, s3_uris: list[str]) -> dict[str, str]:
+        """
+        Fetch several objects concurrently.
+
+        Args:
+            s3_uris (list[str]): URIs of the objects.
+
+        Returns:
+            dict[str, str]: Local path of every object, keyed by its URI.
+        """
+        s3_uris = list(dict.fromkeys(s3_uris))
+        if len(s3_uris) <= 1:
+            return {s3_uri: self.fetch(s3_uri) for s3_uri in s3_uris}
+
+        with ThreadPoolExecutor(max_workers=min(self.download_concurrency, len(s3_uris))) as executor:
+            return dict(zip(s3_uris, executor.map(self.fetch, s3_uris)))
+
+    def evict(self, keep: str) -> None:
+        # The file just fetched is kept even when it alone exceeds `max_bytes`, it is about to be attached
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and not entry.name.endswith(".part") and entry.path != keep:
+                stat = entry.stat()
+                entries.append((stat.st_atime, stat.st_size, entry.path))
+
+        total_bytes = os.path.getsize(keep) + sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            logger.debug(f"Evicting {path} from the attachment cache")
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+
+
+def encode_file(file_path: str) -> str:
+    chunks = []
+    with open(file_path, "rb") as f:
+        while chunk := f.read(ENCODE_CHUNK_SIZE):
+            chunks.append(base64.encodebytes(chunk).decode("ascii"))
+
+    return "".join(chunks)
+
+
+class EncodedPayloadCache:
+    """
+    In-memory LRU cache of base64 encoded files, bounded by the total size of the payloads.
+
+    The emails of a batch attaching the same file share one encoded payload instead of encoding
+    it again each. Payloads are keyed on the file's size and modification time as well, so a
+    changed file is encoded again, and a payload larger than `max_bytes` is never kept.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.payloads: OrderedDict[tuple[str, int, float], str] = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, file_path: str) -> str:
+        stat = os.stat(file_path)
+        key = (file_path, stat.st_size, stat.st_mtime)
+        with self.lock:
+            payload = self.payloads.get(key)
+            if payload is not None:
+                self.payloads.move_to_end(key)
+                self.hits += 1
+                return payload
+            self.misses += 1
+
+        payload = encode_file(file_path)
+        if len(payload) > self.max_bytes:
+            return payload
+
+        with self.lock:
+            if key not in self.payloads:
+                self.payloads[key] = payload
+                self.total_bytes += len(payload)
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self.payloads.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+        return payload
+
+
+def build_attachment_part(file_path: str, file_name: str) -> MIMEBase:
+    """
+    Build a base64 encoded MIME part by streaming the file in chunks. The encoded payload is
+    reused for every email attaching the same file while it stays in the encoded payload cache.
+
+    Args:
+        file_path (str): Path of the file to attach.
+        file_name (str): Name of the attachment shown to the recipient.
+
+    Returns:
+        MIMEBase: MIME attachment for the email.
+    """
+    part = MIMEBase("application", "octet-stream", name=file_name)
+    part.set_payload(encoded_payload_cache.get(file_path))
+    part["Content-Transfer-Encoding"] = "base64"
+    part.add_header("Content-Disposition", "attachment", filename=file_name)
+
+    return part
+
+
+def check_attachments_size(sizes: list[int]) -> None:
+    total_bytes = sum(sizes)
+    if total_bytes > config.EMAIL_MAX_ATTACHMENTS_BYTES:
+        raise AttachmentTooLargeException(
+            f"Attachments are {total_bytes} bytes, the limit is {config.EMAIL_MAX_ATTACHMENTS_BYTES} bytes"
+        )
+
+
+attachment_cache = AttachmentCache(
+    cache_dir=config.EMAIL_ATTACHMENT_CACHE_DIR,
+    max_bytes=config.EMAIL_ATTACHMENT_CACHE_MAX_BYTES,
+    download_concurrency=config.EMAIL_ATTACHMENT_DOWNLOAD_CONCURRENCY,
+    etag_ttl_seconds=config.EMAIL_ATTACHMENT_ETAG_TTL_SECONDS,
+)
+encoded_payload_cache = EncodedPayloadCache(max_bytes=config.EMAIL_ENCODED_ATTACHMENT_CACHE_MAX_BYTES)
@@ -0,0 +1,130 @@
+import time
+from enum import Enum
+
+import redis
+from loguru import logger
+
+from src.core.config import config
+from src.core.helpers.redis import cache
+
+# KEYS[1]: breaker hash, KEYS[2]: half-open probe key, ARGV[1]: failure threshold, ARGV[2]: now
+# Returns the number of consecutive failures
+RECORD_FAILURE_SCRIPT = """
+local failures = redis.call('HINCRBY', KEYS[1], 'failures', 1)
+if failures >= tonumber(ARGV[1]) then
+    redis.call('HSET', KEYS[1], 'opened_at', ARGV[2])
+end
+redis.call('DEL', KEYS[2])
+return failures
+"""
+
+
+class CircuitState(str, Enum):
+    """
+    An enumeration representing the state of a circuit breaker.
+    Attributes:
+        CLOSED: Requests go through.
+        OPEN: Requests are rejected until the reset timeout elapses.
+        HALF_OPEN: The reset timeout elapsed, a single probe request is let through.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker whose state lives in Redis, so it is shared by every worker process and
+    survives between jobs.
+
+    The circuit opens after `failure_threshold` consecutive failures and rejects requests for
+    `reset_timeout_seconds`. After that one caller is let through as a probe: a success closes the
+    circuit, a failure opens it for another timeout. When Redis can't be reached the breaker
+    lets every request through rather than blocking the transport.
+    """
+
+    key_prefix = "circuit"
+
+    def __init__(self, client: redis.Redis, name: str, failure_threshold: int, reset_timeout_seconds: int) -> None:
+        self.client = client
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self.key = f"{self.key_prefix}:{name}"
+        self.probe_key = f"{self.key}:probe"
+        self.record_failure_script = client.register_script(RECORD_FAILURE_SCRIPT)
+
+    def get_status(self) -> tuple[int, float]:
+        failures, opened_at = self.client.hmget(self.key, "failures", "opened_at")
+        return int(failures or 0), float(opened_at or 0)
+
+    def get_state(self) -> CircuitState:
+        failures, opened_at = self.get_status()
+        if failures < self.failure_threshold:
+            return CircuitState.CLOSED
+        if time.time() - opened_at < self.reset_timeout_seconds:
+            return CircuitState.OPEN
+        return CircuitState.HALF_OPEN
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a request may be sent through the transport.
+
+        Returns:
+            bool: True when the circuit is closed, or when it is half-open and this caller won the probe.
+        """
+        try:
+            match self.get_state():
+                case CircuitState.CLOSED:
+                    return True
+                case CircuitState.OPEN:
+                    return False
+                case CircuitState.HALF_OPEN:
+                    return bool(self.client.set(self.probe_key, 1, nx=True, ex=self.reset_timeout_seconds))
+        except redis.RedisError as e:
+            logger.warning(f"Circuit breaker {self.name} is unavailable, allowing the request: {str(e)}")
+            return True
+
+    def record_success(self) -> None:
+        try:
+            if self.client.delete(self.key, self.probe_key):
+                logger.debug(f"Circuit breaker {self.name} reset")
+        except redis.RedisError as e:
+            logger.warning(f"Failed to record a success for circuit breaker {self.name}: {str(e)}")
+
+    def record_failure(self) -> None:
+        try:
+            failures = self.record_failure_script(
+                keys=[self.key, self.probe_key],
+                args=[self.failure_threshold, time.time()],
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Failed to record a failure for circuit breaker {self.name}: {str(e)}")
+            return
+
+        if failures >= self.failure_threshold:
+            logger.warning(f"Circuit breaker {self.name} opened after {failures} consecutive failures")
+
+    def as_dict(self) -> dict:
+        try:
+            failures, opened_at = self.get_status()
+            state = self.get_state()
+        except redis.RedisError:
+            return {"state": None, "failures": None, "opened_at": None}
+
+        return {"state": state, "failures": failures, "opened_at": opened_at or None}
+
+
+smtp_circuit_breaker = CircuitBreaker(
+    client=cache,
+    name="email:smtp",
+    failure_threshold=config.EMAIL_CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout_seconds=config.EMAIL_CIRCUIT_RESET_TIMEOUT_SECONDS,
+)
+ses_circuit_breaker = CircuitBreaker(
+    client=cache,
+    name="email:ses",
+    failure_threshold=config.EMAIL_CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout_seconds=config.EMAIL_CIRCUIT_RESET_TIMEOUT_SECONDS,
+)
@@ -1,11 +1,35 @@
 import os
-import tempfile
-from email.mime.application import MIMEApplication
+import smtplib
+from email.mime.base import MIMEBase
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
 from loguru import logger
 
+from src.core.helpers.attachments import attachment_cache, build_attachment_part, check_attachments_size
+from src.core.helpers.circuit_breaker import ses_circuit_breaker, smtp_circuit_breaker
+
+
+class EmailTransportUnavailableException(Exception):
+    """Raised when the circuits of every email transport are open."""
+
+
+def is_connection_error(error: Exception) -> bool:
+    """
+    Whether a transport couldn't be reached, as opposed to it rejecting the email. Only the former
+    counts as a failure of the transport's circuit.
+    """
+    from botocore.exceptions import ConnectionError as BotoConnectionError
+    from botocore.exceptions import HTTPClientError
+
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    # smtplib's rejections are OSErrors too
+    if isinstance(error, smtplib.SMTPException):
+        return False
+
+    return isinstance(error, (OSError, TimeoutError, BotoConnectionError, HTTPClientError))
+
 
 class EmailHelper:
     def send_email_via_ses(
@@ -58,12 +82,11 @@ class EmailHelper:
             email_body=email,
         )
 
-    def handle_file_attachment(self, temp_dir: str, attachment: dict) -> MIMEApplication:
+    def get_file_attachment(self, attachment: dict, file_paths: dict[str, str]) -> tuple[str, str]:
         """
-        Handle file attachments for email.
+        Resolve a file attachment to its local path and name.
 
         Args:
-            temp_dir (str): Temporary directory to store downloaded files.
             attachment (dict): Dictionary containing file attachment information.
                 Example:
                 {
@@ -71,24 +94,21 @@ class EmailHelper:
                     "file_path": "/file/path",
                     "file_name" (optional): "file_name.csv"
                 }
+            file_paths (dict[str, str]): Local paths of the prefetched S3 attachments, keyed by URI.
 
         Returns:
-            MIMEApplication: MIME attachment for the email.
+            tuple[str, str]: The local file path and the attachment name.
         """
         file_path = attachment.get("file_path", "")
         file_name = attachment.get("file_name") or os.path.basename(file_path)
-        with open(file_path, "rb") as f:
-            part = MIMEApplication(f.read(), Name=file_name)
-            part.add_header("Content-Disposition", "attachment", filename=file_name)
 
-        return part
+        return file_path, file_name
 
-    def handle_s3_attachment(self, temp_dir: str, attachment: dict) -> MIMEApplication:
+    def get_s3_attachment(self, attachment: dict, file_paths: dict[str, str]) -> tuple[str, str]:
         """
-        Handle S3 attachments for email.
+        Resolve an S3 attachment to its cached local path and name.
 
         Args:
-            temp_dir (str): Temporary directory to store downloaded files.
             attachment (dict): Dictionary containing S3 attachment information.
                 Example:
                 {
@@ -96,57 +116,67 @@ class EmailHelper:
                     "s3_uri": "s3://bucket/key",
                     "file_name" (optional): "file_name.csv"
                 }
+            file_paths (dict[str, str]): Local paths of the prefetched S3 attachments, keyed by URI.
 
         Returns:
-            MIMEApplication: MIME attachment for the email.
+            tuple[str, str]: The local file path and the attachment name.
         """
-        from src.core.helpers.s3 import S3Helper
+        file_path = file_paths[attachment["s3_uri"]]
+        file_name = attachment.get("file_name") or os.path.basename(attachment["s3_uri"])
 
-        file_path = S3Helper().download_file(
-            local_dir_path=temp_dir,
-            s3_uri=attachment["s3_uri"],
-        )
-        file_name = attachment.get("file_name") or os.path.basename(file_path)
-        with open(file_path, "rb") as f:
-            part = MIMEApplication(f.read(), Name=file_name)
-            part.add_header("Content-Disposition", "attachment", filename=file_name)
-
-        return part
+        return file_path, file_name
 
-    def get_attachments(self, temp_dir: str, attachments: list[dict[str, str]]) -> list[MIMEApplication]:
+    def get_attachments(self, attachments: list[dict[str, str]]) -> list[MIMEBase]:
         """
-        Process a list of attachments and return a list of MIMEApplication objects.
+        Process a list of attachments and return a list of MIME parts.
+
+        S3 objects are fetched concurrently through the local attachment cache, and the files are
+        encoded in chunks instead of being read into memory at once.
 
         Args:
-            temp_dir (str): Temporary directory to store downloaded files.
             attachments (list[dict[str, str]]): List of attachment dictionaries.
 
         Returns:
-            list[MIMEApplication]: List of MIME attachments for the email.
+            list[MIMEBase]: List of MIME attachments for the email.
+
+        Raises:
+            AttachmentTooLargeException: If the attachments exceed `EMAIL_MAX_ATTACHMENTS_BYTES`.
         """
-        mime_applications = []
+        s3_uris = [attachment["s3_uri"] for attachment in attachments if attachment.get("type") == "s3"]
+        # The sizes of S3 objects come from HEAD requests, so oversized attachments are never downloaded
+        s3_sizes = attachment_cache.get_sizes(s3_uris)
+        check_attachments_size(
+            [
+                s3_sizes[attachment["s3_uri"]]
+                if attachment.get("type") == "s3"
+                else os.path.getsize(attachment.get("file_path", ""))
+                for attachment in attachments
+            ]
+        )
+        file_paths = attachment_cache.fetch_many(s3_uris)
+
+        resolved_attachments = []
         for attachment in attachments:
             func = None
             match attachment.get("type"):
                 case "s3":
-                    func = self.handle_s3_attachment
+                    func = self.get_s3_attachment
                 case "file":
-                    func = self.handle_file_attachment
-            part = func(temp_dir, attachment)
-            mime_applications.append(part)
+                    func = self.get_file_attachment
+            resolved_attachments.append(func(attachment, file_paths))
 
-        return mime_applications
+        return [build_attachment_part(file_path, file_name) for file_path, file_name in resolved_attachments]
 
-    def send_email(
+    def build_message(
         self,
         email_from: str,
         email_to: list[str],
         email_subject: str,
         email_body: str,
         attachments: list[dict[str, str]] | None = None,
-    ):
+    ) -> MIMEMultipart:
         """
-        Send an email with optional attachments.
+        Build the MIME message for an email with optional attachments.
 
         Args:
             email_from (str): The sender's email address.
@@ -156,7 +186,7 @@ class EmailHelper:
             attachments (list[dict[str, str]] | None, optional): List of s3 paths to attach. Defaults to None.
 
         Returns:
-            bool: True if the email was sent successfully, False otherwise.
+            MIMEMultipart: The email message.
         """
         msg = MIMEMultipart()
         msg["From"] = email_from
@@ -166,14 +196,115 @@ class EmailHelper:
         msg.attach(MIMEText(email_body, "html"))
 
         if attachments:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                mime_applications = self.get_attachments(temp_dir, attachments)
-                for mime_application in mime_applications:
-                    msg.attach(mime_application)
-
-        try:
-            return self.send_email_via_smtp(email_from, email_to, msg)
-        except Exception as e:
-            logger.error(f"Error sending email via smtp: {e}")
-            logger.error("Falling back to ses")
-            return self.send_email_via_ses(email_from, email_to, msg)
+            for part in self.get_attachments(attachments):
+                msg.attach(part)
+
+        return msg
+
+    def send_email(
+        self,
+        email_from: str,
+        email_to: list[str],
+        email_subject: str,
+        email_body: str,
+        attachments: list[dict[str, str]] | None = None,
+    ):
+        """
+        Send an email with optional attachments.
+
+        Transports whose circuit is open are skipped, so while the SMTP relay is down emails go
+        straight to SES instead of waiting for the connect timeout first.
+
+        Args:
+            email_from (str): The sender's email address.
+            email_to (list[str]): A list of recipient email addresses.
+            email_subject (str): The subject of the email.
+            email_body (str): The HTML body of the email.
+            attachments (list[dict[str, str]] | None, optional): List of s3 paths to attach. Defaults to None.
+
+        Returns:
+            bool: True once the email was sent.
+
+        Raises:
+            EmailTransportUnavailableException: If the circuits of both transports are open.
+        """
+        msg = self.build_message(email_from, email_to, email_subject, email_body, attachments)
+
+        transports = [
+            ("smtp", smtp_circuit_breaker, self.send_email_via_smtp),
+            ("ses", ses_circuit_breaker, self.send_email_via_ses),
+        ]
+        last_error = None
+        for name, circuit_breaker, send in transports:
+            if not circuit_breaker.allow_request():
+                logger.warning(f"Circuit for {name} is open, skipping it")
+                continue
+            try:
+                send(email_from, email_to, msg)
+            except Exception as e:
+                # A rejected email still falls back to the next transport, but the transport answered
+                if is_connection_error(e):
+                    circuit_breaker.record_failure()
+                else:
+                    circuit_breaker.record_success()
+                logger.error(f"Error sending email via {name}: {e}")
+                last_error = e
+                continue
+            circuit_breaker.record_success()
+            return True
+
+        if last_error is not None:
+            raise last_error
+        raise EmailTransportUnavailableException("The circuits of every email transport are open")
+
+    def send_emails(self, messages: list[dict]) -> list[bool]:
+        """
+        Send several emails, grouping them per transport: as many as possible over pooled SMTP
+        sessions, and the ones SMTP couldn't deliver concurrently through SES. Transports whose
+        circuit is open are skipped.
+
+        Args:
+            messages (list[dict]): Keyword arguments for `build_message`, one dict per email.
+
+        Returns:
+            list[bool]: Whether each email was sent, in the order of `messages`.
+        """
+        from src.core.helpers.ses import SESHelper
+        from src.core.helpers.smtp import SMTPBatchInterruptedException, SMTPHelper
+
+        mime_messages = [
+            (message["email_from"], message["email_to"], self.build_message(**message)) for message in messages
+        ]
+
+        results = [False] * len(mime_messages)
+        if smtp_circuit_breaker.allow_request():
+            try:
+                results = SMTPHelper().send_emails(mime_messages)
+                smtp_circuit_breaker.record_success()
+            except SMTPBatchInterruptedException as e:
+                # The emails sent before the relay went away must not go out again through SES
+                results[: len(e.results)] = e.results
+                if is_connection_error(e.__cause__):
+                    smtp_circuit_breaker.record_failure()
+                logger.error(f"Error sending emails via smtp after {len(e.results)} of {len(mime_messages)}: {e}")
+        else:
+            logger.warning("Circuit for smtp is open, skipping it")
+
+        failed = [index for index, sent in enumerate(results) if not sent]
+        if not failed:
+            return results
+        if not ses_circuit_breaker.allow_request():
+            logger.error(f"Circuit for ses is open, {len(failed)} of {len(mime_messages)} emails were not sent")
+            return results
+
+        logger.error(f"Falling back to ses for {len(failed)} of {len(mime_messages)} emails")
+        ses_results = SESHelper().send_emails([mime_messages[index] for index in failed])
+        for index, sent in zip(failed, ses_results):
+            results[index] = sent
+        # Individual rejections are expected, only a batch where nothing got through counts against SES
+        if any(ses_results):
+            ses_circuit_breaker.record_success()
+        else:
+            ses_circuit_breaker.record_failure()
+
+        return results
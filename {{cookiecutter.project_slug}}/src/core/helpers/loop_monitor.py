@@ -0,0 +1,113 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+import weakref
+
+from loguru import logger
+from starlette.types import Scope
+
+from src.core.config import config
+from src.core.helpers.metrics import EVENT_LOOP_LAG, EVENT_LOOP_STALLS
+
+
+def get_route(scope: Scope | None) -> str:
+    if scope is None:
+        return "none"
+
+    # The router stores the matched route in the scope, raw paths would explode the label values
+    return getattr(scope.get("route"), "path", "unmatched")
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the worker's event loop runs a callback scheduled every `interval_seconds`,
+    which is how long other requests waited on sync code such as bcrypt, sync Redis calls or
+    template rendering.
+
+    A watchdog thread checks the loop's heartbeat. When the loop has been blocked for longer than
+    `stall_threshold_seconds`, the watchdog logs the stack of the blocking code with the route of
+    the request being served. Each stall is logged once.
+    """
+
+    def __init__(self, interval_seconds: float, stall_threshold_seconds: float) -> None:
+        self.interval_seconds = interval_seconds
+        self.stall_threshold_seconds = stall_threshold_seconds
+        self.task: asyncio.Task | None = None
+        self.watchdog: threading.Thread | None = None
+        self.stopped = threading.Event()
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.loop_thread_id: int | None = None
+        self.last_beat = time.monotonic()
+        # Scope of the request each task is serving, read by the watchdog to name the route
+        self.request_scopes: weakref.WeakKeyDictionary[asyncio.Task, Scope] = weakref.WeakKeyDictionary()
+
+    @property
+    def enabled(self) -> bool:
+        return self.task is not None
+
+    def track_request(self, scope: Scope) -> None:
+        if self.enabled and (task := asyncio.current_task()):
+            self.request_scopes[task] = scope
+
+    def untrack_request(self) -> None:
+        if self.enabled and (task := asyncio.current_task()):
+            self.request_scopes.pop(task, None)
+
+    async def run(self) -> None:
+        while True:
+            expected_at = time.perf_counter() + self.interval_seconds
+            await asyncio.sleep(self.interval_seconds)
+            EVENT_LOOP_LAG.observe(max(time.perf_counter() - expected_at, 0))
+            self.last_beat = time.monotonic()
+
+    def watch(self) -> None:
+        reported_beat = None
+        while not self.stopped.wait(self.stall_threshold_seconds / 2):
+            last_beat = self.last_beat
+            blocked_for = time.monotonic() - last_beat - self.interval_seconds
+            if blocked_for < self.stall_threshold_seconds or last_beat == reported_beat:
+                continue
+
+            reported_beat = last_beat
+            frame = sys._current_frames().get(self.loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "unavailable"
+            task = asyncio.current_task(self.loop)
+            scope = self.request_scopes.get(task) if task else None
+            route = get_route(scope)
+            EVENT_LOOP_STALLS.labels(route).inc()
+            request = f"{scope['method']} {scope['path']} ({route})" if scope else "no request"
+            logger.warning(f"Event loop blocked for over {blocked_for * 1000:.0f} ms serving {request}:\n{stack}")
+
+    def start(self) -> None:
+        """
+        Start measuring the lag of the running event loop, from the loop's thread.
+        """
+        if self.task is not None or self.interval_seconds <= 0:
+            return
+
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.stopped.clear()
+        self.task = asyncio.create_task(self.run())
+        self.watchdog = threading.Thread(target=self.watch, name="loop-lag-watchdog", daemon=True)
+        self.watchdog.start()
+
+    def stop(self) -> None:
+        if self.task is None:
+            return
+
+        self.task.cancel()
+        self.task = None
+        self.stopped.set()
+        self.watchdog.join(timeout=1)
+        self.watchdog = None
+        self.request_scopes.clear()
+
+
+loop_lag_monitor = LoopLagMonitor(
+    interval_seconds=config.LOOP_LAG_CHECK_INTERVAL_SECONDS,
+    stall_threshold_seconds=config.LOOP_LAG_STALL_THRESHOLD_SECONDS,
+)
@@ -0,0 +1,215 @@
+import asyncio
+import gc
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import OrderedDict
+from typing import Any
+
+from fastapi import HTTPException, status
+from loguru import logger
+
+from src.core.config import config
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class SnapshotNotFoundException(HTTPException):
+    def __init__(
+        self,
+        status_code: int = status.HTTP_404_NOT_FOUND,
+        detail: Any = "The requested snapshot was not found in this worker.",
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        super().__init__(status_code=status_code, detail=detail, headers=headers)
+
+
+class TracingNotStartedException(HTTPException):
+    def __init__(
+        self,
+        status_code: int = status.HTTP_409_CONFLICT,
+        detail: Any = "Memory tracing is not running in this worker.",
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        super().__init__(status_code=status_code, detail=detail, headers=headers)
+
+
+def get_rss_bytes() -> int:
+    """
+    Current resident set size of the process, or the peak when /proc isn't available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def get_module_name(file_name: str) -> str:
+    """
+    Group a source file under the module it belongs to: the dotted module path for the app's
+    own code (e.g. src.users.crud), and the top level package for libraries (e.g. sqlalchemy).
+    """
+    if file_name.startswith(SRC_DIR + os.sep):
+        relative_path = os.path.relpath(file_name, os.path.dirname(SRC_DIR))
+        return os.path.splitext(relative_path)[0].replace(os.sep, ".")
+
+    for marker in ("site-packages", "dist-packages"):
+        if marker in file_name:
+            package = file_name.split(marker, 1)[1].lstrip(os.sep).split(os.sep, 1)[0]
+            return os.path.splitext(package)[0]
+
+    return os.path.splitext(os.path.basename(file_name))[0]
+
+
+class MemoryProfiler:
+    """
+    Per-process wrapper around tracemalloc. Every gunicorn worker traces and keeps its snapshots
+    on its own, so the responses name the worker that served them.
+    """
+
+    def __init__(self, max_snapshots: int) -> None:
+        self.max_snapshots = max_snapshots
+        self.snapshots: OrderedDict[str, tracemalloc.Snapshot] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_status(self) -> dict:
+        current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        return {
+            "pid": os.getpid(),
+            "tracing": tracemalloc.is_tracing(),
+            "traced_bytes": current_bytes,
+            "traced_peak_bytes": peak_bytes,
+            "rss_bytes": get_rss_bytes(),
+            "gc_counts": gc.get_count(),
+            "snapshots": list(self.snapshots),
+        }
+
+    def start(self, frames: int = 1) -> dict:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            logger.info(f"Started memory tracing in worker {os.getpid()} with {frames} frames")
+
+        return self.get_status()
+
+    def stop(self) -> dict:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            logger.info(f"Stopped memory tracing in worker {os.getpid()}")
+
+        with self.lock:
+            self.snapshots.clear()
+        return self.get_status()
+
+    def take_snapshot(self) -> dict:
+        if not tracemalloc.is_tracing():
+            raise TracingNotStartedException()
+
+        # Collect first so the snapshot shows what is actually retained
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen *>")]
+        )
+        snapshot_id = uuid.uuid4().hex[:12]
+        with self.lock:
+            self.snapshots[snapshot_id] = snapshot
+            while len(self.snapshots) > self.max_snapshots:
+                self.snapshots.popitem(last=False)
+
+        return {"id": snapshot_id, "taken_at": time.time(), **self.get_status()}
+
+    def get_snapshot(self, snapshot_id: str) -> tracemalloc.Snapshot:
+        try:
+            return self.snapshots[snapshot_id]
+        except KeyError:
+            raise SnapshotNotFoundException()
+
+    @staticmethod
+    def group_by_module(stats: list[tracemalloc.Statistic | tracemalloc.StatisticDiff], limit: int) -> list[dict]:
+        modules: dict[str, dict] = {}
+        for stat in stats:
+            module = modules.setdefault(
+                get_module_name(stat.traceback[0].filename),
+                {"size_bytes": 0, "count": 0, "size_diff_bytes": 0, "count_diff": 0},
+            )
+            module["size_bytes"] += stat.size
+            module["count"] += stat.count
+            module["size_diff_bytes"] += getattr(stat, "size_diff", 0)
+            module["count_diff"] += getattr(stat, "count_diff", 0)
+
+        sort_key = "size_diff_bytes" if stats and hasattr(stats[0], "size_diff") else "size_bytes"
+        ranked = sorted(modules.items(), key=lambda item: abs(item[1][sort_key]), reverse=True)
+        return [{"module": name, **values} for name, values in ranked[:limit]]
+
+    def top(self, snapshot_id: str, limit: int = 20) -> list[dict]:
+        """
+        Largest allocators of a snapshot, grouped by module.
+
+        Args:
+            snapshot_id (str): Id of the snapshot.
+            limit (int, optional): Number of modules returned. Defaults to 20.
+
+        Returns:
+            list[dict]: Retained size and allocation count per module, largest first.
+        """
+        stats = self.get_snapshot(snapshot_id).statistics("filename")
+        return self.group_by_module(stats, limit)
+
+    def diff(self, first_snapshot_id: str, second_snapshot_id: str, limit: int = 20) -> list[dict]:
+        """
+        Growth between two snapshots, grouped by module.
+
+        Args:
+            first_snapshot_id (str): Id of the older snapshot.
+            second_snapshot_id (str): Id of the newer snapshot.
+            limit (int, optional): Number of modules returned. Defaults to 20.
+
+        Returns:
+            list[dict]: Size and count differences per module, largest change first.
+        """
+        stats = self.get_snapshot(second_snapshot_id).compare_to(self.get_snapshot(first_snapshot_id), "filename")
+        return self.group_by_module(stats, limit)
+
+
+memory_profiler = MemoryProfiler(max_snapshots=config.MEMORY_MAX_SNAPSHOTS)
+
+
+class MemorySampler:
+    """
+    Logs the worker's RSS and GC generation counts at a fixed interval, to tell steady growth
+    apart from spikes without tracing allocations.
+    """
+
+    def __init__(self, interval_seconds: int) -> None:
+        self.interval_seconds = interval_seconds
+        self.task: asyncio.Task | None = None
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            generations = ", ".join(
+                f"gen{generation}={stats['collections']} collections/{stats['collected']} collected"
+                for generation, stats in enumerate(gc.get_stats())
+            )
+            logger.info(
+                f"Worker {os.getpid()} rss={get_rss_bytes() / 1024 / 1024:.1f} MiB "
+                f"gc_counts={gc.get_count()} {generations}"
+            )
+
+    def start(self) -> None:
+        if self.task is None and self.interval_seconds > 0:
+            self.task = asyncio.create_task(self.run())
+
+    def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+
+memory_sampler = MemorySampler(interval_seconds=config.MEMORY_SAMPLE_INTERVAL_SECONDS)
@@ -0,0 +1,206 @@
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+from prometheus_client.registry import Collector
+
+# Metrics are written to files shared by the gunicorn workers when PROMETHEUS_MULTIPROC_DIR is
+# set, so any worker can serve the totals of all of them
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+# Buckets in seconds, from sub-millisecond cache hits to slow requests
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time spent serving a request, per route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections currently checked out of the SQLAlchemy pool",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Connections open beyond the SQLAlchemy pool size",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool",
+    ["pool"],
+    buckets=LATENCY_BUCKETS,
+)
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Round trip time of Redis commands",
+    ["command"],
+    buckets=LATENCY_BUCKETS,
+)
+CERBOS_REQUEST_DURATION = Histogram(
+    "cerbos_request_duration_seconds",
+    "Round trip time of Cerbos permission checks",
+    ["action", "resource_kind"],
+    buckets=LATENCY_BUCKETS,
+)
+CERBOS_DECISIONS = Counter(
+    "cerbos_decisions_total",
+    "Cerbos permission checks by decision",
+    ["action", "resource_kind", "decision"],
+)
+BCRYPT_DURATION = Histogram(
+    "bcrypt_duration_seconds",
+    "Time spent hashing and verifying passwords",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1, 2),
+)
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Delay of the event loop in running a scheduled callback",
+    buckets=LATENCY_BUCKETS,
+)
+EVENT_LOOP_STALLS = Counter(
+    "event_loop_stalls_total",
+    "Times the event loop was blocked beyond the stall threshold, per route template",
+    ["route"],
+)
+
+
+class QueueDepthCollector(Collector):
+    """
+    Reports the number of jobs waiting in every rq queue. The depth lives in Redis, so it is read
+    when scraped instead of being tracked per process.
+    """
+
+    def describe(self):
+        # Keeps the registry from collecting, and querying Redis, on registration
+        return []
+
+    def collect(self):
+        from src.core.helpers.rq import queues
+
+        depth = GaugeMetricFamily("rq_queue_depth", "Jobs waiting in the rq queue", labels=["queue"])
+        for name, queue in queues.items():
+            depth.add_metric([name.value], queue.count)
+
+        yield depth
+
+
+class JobStatsCollector(Collector):
+    """
+    Reports the jobs enqueued, started and finished with their wait and run times, per queue and
+    job function. The app and the workers total them in Redis, so the rq workers need no metrics
+    endpoint of their own.
+    """
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        from src.core.constants import JobOutcome
+        from src.core.helpers.rq import job_stats
+
+        labels = ["queue", "job"]
+        enqueued = CounterMetricFamily("rq_jobs_enqueued", "Jobs enqueued", labels=labels)
+        started = CounterMetricFamily("rq_jobs_started", "Jobs started by a worker", labels=labels)
+        finished = CounterMetricFamily(
+            "rq_jobs_finished", "Job runs by outcome: succeeded, failed or retried", labels=[*labels, "outcome"]
+        )
+        slo_breaches = CounterMetricFamily(
+            "rq_job_wait_slo_breaches",
+            "Jobs that waited in their queue for longer than the queue's JOB_WAIT_SLO_SECONDS",
+            labels=labels,
+        )
+        wait = HistogramMetricFamily(
+            "rq_job_wait_seconds", "Time jobs waited in their queue before a worker started them", labels=labels
+        )
+        run = HistogramMetricFamily("rq_job_run_seconds", "Time spent running jobs", labels=labels)
+        for (queue_name, job_name), stats in job_stats.get_totals().items():
+            label_values = [queue_name, job_name]
+            enqueued.add_metric(label_values, stats.get("enqueued", 0))
+            started.add_metric(label_values, stats.get("started", 0))
+            for outcome in JobOutcome:
+                finished.add_metric([*label_values, outcome.value], stats.get(outcome.value, 0))
+            slo_breaches.add_metric(label_values, stats.get("slo_breaches", 0))
+            wait.add_metric(label_values, job_stats.get_cumulative_buckets(stats, "wait"), stats.get("wait_seconds", 0))
+            run.add_metric(label_values, job_stats.get_cumulative_buckets(stats, "run"), stats.get("run_seconds", 0))
+
+        yield from [enqueued, started, finished, slo_breaches, wait, run]
+
+
+class CircuitBreakerCollector(Collector):
+    """
+    Reports the state of the email transport circuit breakers, which is shared by the workers in Redis.
+    """
+
+    states = {"closed": 0, "half_open": 1, "open": 2}
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        from src.core.helpers.circuit_breaker import ses_circuit_breaker, smtp_circuit_breaker
+
+        state = GaugeMetricFamily(
+            "email_circuit_breaker_state",
+            "State of the email transport circuit breaker: 0 closed, 1 half-open, 2 open",
+            labels=["transport"],
+        )
+        failures = GaugeMetricFamily(
+            "email_circuit_breaker_failures",
+            "Consecutive failures of the email transport",
+            labels=["transport"],
+        )
+        for transport, circuit_breaker in [("smtp", smtp_circuit_breaker), ("ses", ses_circuit_breaker)]:
+            status = circuit_breaker.as_dict()
+            if status["state"] is None:
+                continue
+            state.add_metric([transport], self.states[status["state"].value])
+            failures.add_metric([transport], status["failures"])
+
+        yield state
+        yield failures
+
+
+# Collectors that read shared state from Redis when scraped
+SCRAPE_COLLECTORS = [QueueDepthCollector(), JobStatsCollector(), CircuitBreakerCollector()]
+
+
+def get_registry() -> CollectorRegistry:
+    if not MULTIPROCESS:
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    for collector in SCRAPE_COLLECTORS:
+        registry.register(collector)
+    return registry
+
+
+def generate_metrics() -> tuple[bytes, str]:
+    """
+    Render every metric in the Prometheus text format.
+
+    Returns:
+        tuple[bytes, str]: The metrics and their content type.
+    """
+    return generate_latest(get_registry()), CONTENT_TYPE_LATEST
+
+
+if not MULTIPROCESS:
+    for collector in SCRAPE_COLLECTORS:
+        REGISTRY.register(collector)
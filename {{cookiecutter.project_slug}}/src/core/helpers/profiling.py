@@ -0,0 +1,115 @@
+import json
+import random
+import threading
+import time
+import uuid
+from typing import Any
+
+import redis
+from fastapi import HTTPException, status
+from jwt.exceptions import PyJWTError
+
+from src.core.config import config
+from src.core.constants import TokenType
+from src.core.helpers.redis import cache
+from src.core.security.tokens import Tokens
+
+PROFILE_TOKEN_HEADER = b"x-profile-token"
+
+
+class ProfileNotFoundException(HTTPException):
+    def __init__(
+        self,
+        status_code: int = status.HTTP_404_NOT_FOUND,
+        detail: Any = "The requested profile was not found or has expired.",
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        super().__init__(status_code=status_code, detail=detail, headers=headers)
+
+
+class ProfileStore:
+    """
+    Keeps the recorded profiles in Redis.
+
+    Profiles are speedscope documents, kept for `PROFILING_RETENTION_SECONDS` and capped at the
+    `PROFILING_MAX_PROFILES` most recent ones.
+    """
+
+    key_prefix = "profile"
+
+    def __init__(self, client: redis.Redis) -> None:
+        self.client = client
+        self.index_key = f"{self.key_prefix}:index"
+
+    def get_profile_key(self, profile_id: str) -> str:
+        return f"{self.key_prefix}:data:{profile_id}"
+
+    def save(self, profile_id: str, summary: dict, speedscope: str) -> None:
+        pipeline = self.client.pipeline()
+        pipeline.setex(self.get_profile_key(profile_id), config.PROFILING_RETENTION_SECONDS, speedscope)
+        pipeline.zadd(self.index_key, {json.dumps({"id": profile_id, **summary}): time.time()})
+        pipeline.zremrangebyscore(self.index_key, 0, time.time() - config.PROFILING_RETENTION_SECONDS)
+        pipeline.zremrangebyrank(self.index_key, 0, -config.PROFILING_MAX_PROFILES - 1)
+        pipeline.execute()
+
+    def list(self) -> list[dict]:
+        return [json.loads(entry) for entry in self.client.zrevrange(self.index_key, 0, -1)]
+
+    def get(self, profile_id: str) -> bytes:
+        speedscope = self.client.get(self.get_profile_key(profile_id))
+        if speedscope is None:
+            raise ProfileNotFoundException()
+
+        return speedscope
+
+
+profile_store = ProfileStore(client=cache)
+
+
+class ProfilingSlots:
+    """
+    Caps the number of requests profiled at once in this process, so a burst of sampled or
+    token-carrying requests can't multiply the profiler's overhead.
+    """
+
+    def __init__(self, max_concurrent: int) -> None:
+        self.semaphore = threading.BoundedSemaphore(max_concurrent)
+
+    def acquire(self) -> bool:
+        return self.semaphore.acquire(blocking=False)
+
+    def release(self) -> None:
+        self.semaphore.release()
+
+
+profiling_slots = ProfilingSlots(max_concurrent=config.PROFILING_MAX_CONCURRENT)
+
+
+def is_valid_profiling_token(token: str) -> bool:
+    # A signed JWT checked without a round trip to Redis, since this runs on the event loop for every request
+    try:
+        return Tokens.decode_token(token)["token_type"] == TokenType.PROFILING.value
+    except (PyJWTError, KeyError):
+        return False
+
+
+def should_profile(headers: list[tuple[bytes, bytes]]) -> bool:
+    """
+    Decide whether to profile a request: it carries a valid profiling token issued to an admin,
+    or it was picked by `PROFILING_SAMPLE_RATE`.
+
+    Args:
+        headers (list[tuple[bytes, bytes]]): Raw headers of the request.
+
+    Returns:
+        bool: True if the request should be profiled.
+    """
+    for name, value in headers:
+        if name == PROFILE_TOKEN_HEADER:
+            return is_valid_profiling_token(value.decode("latin-1"))
+
+    return config.PROFILING_SAMPLE_RATE > 0 and random.random() < config.PROFILING_SAMPLE_RATE
+
+
+def new_profile_id() -> str:
+    return uuid.uuid4().hex
@@ -2,11 +2,22 @@ import redis
 from loguru import logger
 
 from src.core.config import config
+from src.core.helpers.metrics import REDIS_COMMAND_DURATION
+from src.core.helpers.timing import timed
+
+
+class TimedRedis(redis.Redis):
+    """Redis client that records the time of every command in the request timings and metrics."""
+
+    def execute_command(self, *args, **options):
+        command = str(args[0]).upper()
+        with timed("redis", metric=REDIS_COMMAND_DURATION.labels(command), attributes={"db.operation.name": command}):
+            return super().execute_command(*args, **options)
 
 
 def redis_connect(db: int = config.REDIS_DB) -> redis.client.Redis | None:
     try:
-        client = redis.Redis(
+        client = TimedRedis(
             host=config.REDIS_HOST,
             port=config.REDIS_PORT,
             db=db,
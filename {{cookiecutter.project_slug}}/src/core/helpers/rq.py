@@ -1,11 +1,360 @@
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import redis
+from loguru import logger
+from opentelemetry.trace import SpanKind
 from rq import Queue
+from rq.job import Job, JobStatus
+from rq.worker import SimpleWorker
 from rq_dashboard_fast import RedisQueueDashboard
 
 from src.core.config import config
+from src.core.constants import JobOutcome, TaskQueue
 from src.core.helpers.redis import task_queue
+from src.core.helpers.tracing import tracing
+
+# Separate queues so that jobs a user is waiting on aren't stuck behind batches and preloads
+queues = {name: Queue(name=name.value, connection=task_queue) for name in TaskQueue}
+queue = queues[TaskQueue.DEFAULT]
+
+
+def get_queue(name: TaskQueue) -> Queue:
+    return queues[name]
+
+
+# Upper bounds of the job wait and run time histograms, in seconds
+JOB_DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900)
+
+
+class JobStats:
+    """
+    Counts the jobs enqueued, started, succeeded, failed and retried with their wait and run
+    times, per queue and job function. Every count is added to running totals, which the metrics
+    report when scraped, and to a bucket of the current minute that expires after
+    `retention_minutes`, a compact history for `/health/jobs/` and `/health/queues/`. Both are
+    Redis hashes, so they cover the app and all the workers.
+    """
+
+    key_prefix = "rq:stats"
+    buckets = [str(float(bound)) for bound in JOB_DURATION_BUCKETS] + ["+Inf"]
+    counted_stats = ["enqueued", "started", *(outcome.value for outcome in JobOutcome), "slo_breaches"]
+
+    def __init__(self, client: redis.Redis, retention_minutes: int, wait_slo_seconds: dict[str, float]) -> None:
+        self.client = client
+        self.retention_minutes = retention_minutes
+        self.wait_slo_seconds = wait_slo_seconds
+        self.totals_key = f"{self.key_prefix}:totals"
+
+    def get_minute_key(self, minute: int) -> str:
+        return f"{self.key_prefix}:minute:{minute}"
+
+    def get_bucket(self, seconds: float) -> str:
+        return next((bucket for bucket, bound in zip(self.buckets, JOB_DURATION_BUCKETS) if seconds <= bound), "+Inf")
+
+    def record(
+        self, queue_name: str, job_name: str, counts: dict[str, float], durations: dict[str, float] | None = None
+    ) -> None:
+        """
+        Add to the stats of a job function in one round trip.
+
+        Args:
+            queue_name (str): Name of the job's queue.
+            job_name (str): Label of the job function, see `get_job_name`.
+            counts (dict[str, float]): Amounts added to the totals and the current minute.
+            durations (dict[str, float] | None, optional): Observations of the wait and run time
+                histograms, in seconds. Defaults to None.
+        """
+        minute_key = self.get_minute_key(int(time.time() // 60))
+        pipeline = self.client.pipeline(transaction=False)
+        for stat, value in counts.items():
+            field = f"{queue_name}|{job_name}|{stat}"
+            pipeline.hincrbyfloat(self.totals_key, field, value)
+            pipeline.hincrbyfloat(minute_key, field, value)
+        for histogram, seconds in (durations or {}).items():
+            field = f"{queue_name}|{job_name}|{histogram}_le:{self.get_bucket(seconds)}"
+            pipeline.hincrby(self.totals_key, field, 1)
+            pipeline.hincrby(minute_key, field, 1)
+        pipeline.expire(minute_key, self.retention_minutes * 60)
+        pipeline.execute()
+
+    def record_enqueued(self, queue_name: str, job_name: str, count: int = 1) -> None:
+        self.record(queue_name, job_name, {"enqueued": count})
+
+    def record_started(self, queue_name: str, job_name: str, wait_seconds: float) -> None:
+        counts = {"started": 1, "wait_seconds": wait_seconds}
+        if wait_seconds > self.wait_slo_seconds.get(queue_name, float("inf")):
+            counts["slo_breaches"] = 1
+        self.record(queue_name, job_name, counts, durations={"wait": wait_seconds})
+
+    def record_finished(self, queue_name: str, job_name: str, outcome: JobOutcome, run_seconds: float) -> None:
+        self.record(
+            queue_name, job_name, {outcome.value: 1, "run_seconds": run_seconds}, durations={"run": run_seconds}
+        )
+
+    @staticmethod
+    def parse(fields: dict[bytes, bytes]) -> dict[tuple[str, str], dict[str, float]]:
+        stats = defaultdict(dict)
+        for field, value in fields.items():
+            queue_name, job_name, stat = field.decode().split("|", 2)
+            stats[(queue_name, job_name)][stat] = float(value)
+
+        return stats
+
+    def get_totals(self) -> dict[tuple[str, str], dict[str, float]]:
+        """
+        Returns:
+            dict[tuple[str, str], dict[str, float]]: The running totals per queue and job function.
+        """
+        return self.parse(self.client.hgetall(self.totals_key))
+
+    def get_cumulative_buckets(self, stats: dict[str, float], histogram: str) -> list[tuple[str, float]]:
+        cumulative, buckets = 0, []
+        for bucket in self.buckets:
+            cumulative += stats.get(f"{histogram}_le:{bucket}", 0)
+            buckets.append((bucket, cumulative))
+
+        return buckets
+
+    @staticmethod
+    def get_quantile_ms(buckets: list[tuple[str, float]], quantile: float) -> float | None:
+        # Upper bound of the bucket the quantile falls in, None when there are no observations or it is +Inf
+        total = buckets[-1][1]
+        if not total:
+            return None
+        bucket = next(bucket for bucket, cumulative in buckets if cumulative >= total * quantile)
+
+        return float(bucket) * 1000 if bucket != "+Inf" else None
+
+    def get_minutes(self, minutes: int) -> list[tuple[int, dict[tuple[str, str], dict[str, float]]]]:
+        current_minute = int(time.time() // 60)
+        minutes_range = range(current_minute - minutes + 1, current_minute + 1)
+        pipeline = self.client.pipeline(transaction=False)
+        for minute in minutes_range:
+            pipeline.hgetall(self.get_minute_key(minute))
+
+        return [(minute, self.parse(fields)) for minute, fields in zip(minutes_range, pipeline.execute())]
+
+    def get_queue_latency(self, minutes: int) -> dict[str, dict]:
+        """
+        Summarize how long the jobs started in the last minutes waited in every queue.
+
+        Args:
+            minutes (int): Number of minutes up to the current one.
+
+        Returns:
+            dict[str, dict]: Per queue, the number of queued jobs, the jobs started, their average
+                wait, and the upper bounds of the wait histogram buckets holding the median and
+                95th percentile.
+        """
+        waits = defaultdict(Counter)
+        for _, minute_stats in self.get_minutes(minutes):
+            for (queue_name, _), stats in minute_stats.items():
+                waits[queue_name].update(
+                    {stat: value for stat, value in stats.items() if stat.startswith(("started", "wait_"))}
+                )
+
+        latency = {}
+        for name, named_queue in queues.items():
+            stats = waits[name.value]
+            started = stats.get("started", 0)
+            buckets = self.get_cumulative_buckets(stats, "wait")
+            latency[name.value] = {
+                "queued": named_queue.count,
+                "started": int(started),
+                "avg_wait_ms": round(stats.get("wait_seconds", 0) / started * 1000, 1) if started else None,
+                "p50_ms": self.get_quantile_ms(buckets, 0.5),
+                "p95_ms": self.get_quantile_ms(buckets, 0.95),
+            }
+
+        return latency
+
+    def get_series(self, minutes: int) -> list[dict]:
+        """
+        Read the per-minute stats of every queue and job function, oldest first.
+
+        Args:
+            minutes (int): Number of minutes up to the current one.
+
+        Returns:
+            list[dict]: One entry per minute, queue and job function that had any jobs.
+        """
+        series = []
+        for minute, minute_stats in self.get_minutes(minutes):
+            for (queue_name, job_name), stats in sorted(minute_stats.items()):
+                started = stats.get("started", 0)
+                finished = sum(stats.get(outcome.value, 0) for outcome in JobOutcome)
+                series.append(
+                    {
+                        "minute": datetime.fromtimestamp(minute * 60, tz=timezone.utc).isoformat(),
+                        "queue": queue_name,
+                        "job": job_name,
+                        **{stat: int(stats.get(stat, 0)) for stat in self.counted_stats},
+                        "avg_wait_ms": round(stats.get("wait_seconds", 0) / started * 1000, 1) if started else None,
+                        "avg_run_ms": round(stats.get("run_seconds", 0) / finished * 1000, 1) if finished else None,
+                    }
+                )
+
+        return series
+
+
+job_stats = JobStats(
+    client=task_queue,
+    retention_minutes=config.JOB_STATS_RETENTION_MINUTES,
+    wait_slo_seconds=config.JOB_WAIT_SLO_SECONDS,
+)
+
+
+def get_job_name(job: Job) -> str:
+    """
+    Label of the job function in the stats, e.g. `SendEmail.run:MFAEmail`. Methods of job classes
+    are prefixed with their class, and email jobs suffixed with the email class they send, so the
+    MFA codes can be told apart from the other critical emails.
+    """
+    name = job.func_name
+    if job.instance is not None:
+        name = f"{type(job.instance).__name__}.{name}"
+    if email_class := job.kwargs.get("email_class"):
+        name = f"{name}:{email_class}"
+
+    return name
+
+
+def record_enqueued(jobs: list[Job]) -> None:
+    """
+    Count the jobs just enqueued, per queue and job function.
+
+        job = get_queue(TaskQueue.DEFAULT).enqueue(func)
+        record_enqueued([job])
+
+    Args:
+        jobs (list[Job]): The jobs returned by `enqueue` or `enqueue_many`.
+    """
+    try:
+        for (queue_name, job_name), count in Counter((job.origin, get_job_name(job)) for job in jobs).items():
+            job_stats.record_enqueued(queue_name, job_name, count)
+    except redis.RedisError as e:
+        logger.warning(f"Failed to record {len(jobs)} enqueued jobs: {str(e)}")
+
+
+def get_enqueued_at(job: Job) -> datetime | None:
+    # Older rq versions store naive UTC datetimes
+    if job.enqueued_at is not None and job.enqueued_at.tzinfo is None:
+        return job.enqueued_at.replace(tzinfo=timezone.utc)
+
+    return job.enqueued_at
+
+
+def record_queue_latency(job: Job, queue: Queue) -> None:
+    """
+    Log and record how long a job waited in its queue before a worker started it.
+
+    Args:
+        job (Job): The job about to start.
+        queue (Queue): The queue the job was taken from.
+    """
+    enqueued_at = get_enqueued_at(job)
+    if enqueued_at is None:
+        return
+
+    latency_seconds = (datetime.now(timezone.utc) - enqueued_at).total_seconds()
+    logger.info(f"Job {job.id} waited {latency_seconds * 1000:.1f}ms in the {queue.name} queue")
+    try:
+        job_stats.record_started(queue.name, get_job_name(job), latency_seconds)
+    except redis.RedisError as e:
+        logger.warning(f"Failed to record the latency of job {job.id}: {str(e)}")
+
+
+def record_job_finished(job: Job, queue: Queue, run_seconds: float) -> None:
+    """
+    Record the outcome and run time of a job, once the worker handled its success or failure.
+
+    Args:
+        job (Job): The job that ran.
+        queue (Queue): The queue the job was taken from.
+        run_seconds (float): Time spent running the job.
+    """
+    # Set on the job by the worker, failed jobs with retries left are queued or scheduled again
+    status = job.get_status(refresh=False)
+    if status == JobStatus.FINISHED:
+        outcome = JobOutcome.SUCCEEDED
+    elif status in (JobStatus.QUEUED, JobStatus.SCHEDULED):
+        outcome = JobOutcome.RETRIED
+    else:
+        outcome = JobOutcome.FAILED
+
+    try:
+        job_stats.record_finished(queue.name, get_job_name(job), outcome, run_seconds)
+    except redis.RedisError as e:
+        logger.warning(f"Failed to record the outcome of job {job.id}: {str(e)}")
+
+
+def get_trace_meta() -> dict:
+    """
+    Job meta carrying the trace context of the enqueuing request, for `traced_job` to restore.
+
+        queue.enqueue(func, meta=get_trace_meta())
+    """
+    carrier = tracing.inject()
+    return {"trace_context": carrier} if carrier else {}
+
+
+@contextmanager
+def traced_job(job: Job, queue: Queue):
+    """
+    Trace the job as a consumer span continuing the trace it was enqueued from, preceded by a
+    span covering the time it waited in the queue.
+
+    Args:
+        job (Job): The job about to run.
+        queue (Queue): The queue the job was taken from.
+    """
+    if not tracing.enabled:
+        yield
+        return
+
+    parent = tracing.extract(job.meta.get("trace_context"))
+    attributes = {"messaging.system": "rq", "messaging.destination.name": queue.name, "messaging.message.id": job.id}
+    if enqueued_at := get_enqueued_at(job):
+        tracing.start_span("queue wait", attributes=attributes, context=parent, start_time=enqueued_at).end()
+
+    span_name = f"{queue.name} process {job.func_name}"
+    with tracing.span(span_name, kind=SpanKind.CONSUMER, attributes=attributes, context=parent):
+        yield
+
+
+class LatencyTrackingWorker(SimpleWorker):
+    """
+    Runs jobs in the worker process like `SimpleWorker`, so pooled SMTP sessions survive between
+    jobs, and records how long each job waited in its queue, how long it ran and how it ended.
+    Jobs are traced when tracing is enabled.
+
+    rq runs every coroutine job on a new event loop, and asyncpg connections can't be used from
+    another loop than the one they were opened on, so the worker needs `DB_POOL_SIZE=0`.
+    """
+
+    # Unset by workers that run coroutine jobs on an event loop of their own
+    new_event_loop_per_job = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        tracing.setup(component="worker")
+        if self.new_event_loop_per_job and config.DB_POOL_SIZE != 0:
+            logger.warning(
+                f"{self.__class__.__name__} runs with DB_POOL_SIZE={config.DB_POOL_SIZE}, coroutine jobs after the "
+                "first one will fail on connections pooled by an earlier job's event loop. Set DB_POOL_SIZE=0."
+            )
+
+    def execute_job(self, job, queue):
+        record_queue_latency(job, queue)
+        start_time = time.perf_counter()
+        with traced_job(job, queue):
+            result = super().execute_job(job, queue)
+        record_job_finished(job, queue, run_seconds=time.perf_counter() - start_time)
+        return result
 
-# Add a seperate queue for emails and other tasks
-queue = Queue(connection=task_queue)
 
 # Rq Dashboard
 dashboard = RedisQueueDashboard(
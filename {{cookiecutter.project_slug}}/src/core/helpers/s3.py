@@ -0,0 +1,69 @@
+import os
+from functools import lru_cache
+from urllib.parse import urlparse
+
+import boto3
+from loguru import logger
+
+
+@lru_cache
+def get_s3_client():
+    # boto3 clients are thread safe and expensive to build, so one is shared per process
+    return boto3.client("s3")
+
+
+class S3Helper:
+    """Helper class for reading objects from Amazon S3."""
+
+    def __init__(self):
+        self.client = get_s3_client()
+
+    @staticmethod
+    def parse_s3_uri(s3_uri: str) -> tuple[str, str]:
+        """
+        Split an S3 URI into its bucket and key.
+
+        Args:
+            s3_uri (str): URI of the object, e.g. s3://bucket/path/to/key.
+
+        Returns:
+            tuple[str, str]: The bucket and the key.
+        """
+        parsed_uri = urlparse(s3_uri)
+        if parsed_uri.scheme != "s3" or not parsed_uri.netloc or not parsed_uri.path.lstrip("/"):
+            raise ValueError(f"Invalid S3 URI: {s3_uri}")
+
+        return parsed_uri.netloc, parsed_uri.path.lstrip("/")
+
+    def head_object(self, s3_uri: str) -> dict:
+        """
+        Fetch the metadata of an object without downloading it.
+
+        Args:
+            s3_uri (str): URI of the object.
+
+        Returns:
+            dict: The response from the S3 head_object API call.
+        """
+        bucket, key = self.parse_s3_uri(s3_uri)
+        return self.client.head_object(Bucket=bucket, Key=key)
+
+    def download_file(self, local_dir_path: str, s3_uri: str, file_name: str | None = None) -> str:
+        """
+        Download an object into a local directory.
+
+        Args:
+            local_dir_path (str): Directory to download the object into.
+            s3_uri (str): URI of the object.
+            file_name (str | None, optional): Name of the local file. Defaults to the key's base name.
+
+        Returns:
+            str: Path of the downloaded file.
+        """
+        bucket, key = self.parse_s3_uri(s3_uri)
+        file_path = os.path.join(local_dir_path, file_name or os.path.basename(key))
+
+        logger.info(f"Downloading {s3_uri} to {file_path}")
+        self.client.download_file(Bucket=bucket, Key=key, Filename=file_path)
+
+        return file_path
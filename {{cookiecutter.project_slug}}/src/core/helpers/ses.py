@@ -1,14 +1,43 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.multipart import MIMEMultipart
+from functools import lru_cache
 
 import boto3
 from loguru import logger
 
+from src.core.config import config
+
+
+@lru_cache
+def get_ses_client():
+    # boto3 clients are thread safe and expensive to build, so one is shared per process
+    return boto3.client("ses")
+
+
+class RateLimiter:
+    """Spaces out calls so that no more than `rate` happen per second across threads."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_call_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            wait_seconds = self.next_call_at - now
+            self.next_call_at = max(now, self.next_call_at) + self.interval
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+
 
 class SESHelper:
     """Helper class for sending emails using Amazon SES."""
 
     def __init__(self):
-        self.client = boto3.client("ses")
+        self.client = get_ses_client()
 
     def send_email(
         self,
@@ -35,3 +64,27 @@ class SESHelper:
         )
 
         return response
+
+    def send_emails(self, messages: list[tuple[str, list[str], MIMEMultipart]]) -> list[bool]:
+        """
+        Send several emails concurrently with the shared client, staying under `SES_MAX_SEND_RATE`.
+
+        Args:
+            messages (list[tuple[str, list[str], MIMEMultipart]]): (email_from, email_to, email_body) tuples.
+
+        Returns:
+            list[bool]: Whether each message was sent, in the order of `messages`.
+        """
+        rate_limiter = RateLimiter(rate=config.SES_MAX_SEND_RATE)
+
+        def send(message: tuple[str, list[str], MIMEMultipart]) -> bool:
+            rate_limiter.wait()
+            try:
+                self.send_email(*message)
+                return True
+            except Exception as e:
+                logger.error(f"Failed to send email to {message[1]} via AWS SES: {e}")
+                return False
+
+        with ThreadPoolExecutor(max_workers=config.SES_MAX_CONCURRENCY) as executor:
+            return list(executor.map(send, messages))
@@ -1,4 +1,8 @@
+import atexit
 import smtplib
+import threading
+import time
+from contextlib import contextmanager
 from email.mime.multipart import MIMEMultipart
 
 from loguru import logger
@@ -6,7 +10,174 @@ from loguru import logger
 from src.core.config import config
 
 
+class SMTPBatchInterruptedException(smtplib.SMTPException):
+    """Raised when a batch of emails stops part way, with the results of the messages before it."""
+
+    def __init__(self, message: str, results: list[bool]) -> None:
+        super().__init__(message)
+        self.results = results
+
+
+class PooledSMTPConnection:
+    """An authenticated SMTP session together with its usage bookkeeping."""
+
+    def __init__(self, client) -> None:
+        self.client = client
+        self.messages_sent = 0
+        self.last_used_at = time.monotonic()
+
+    @property
+    def idle_seconds(self) -> float:
+        return time.monotonic() - self.last_used_at
+
+    @property
+    def exhausted(self) -> bool:
+        return self.messages_sent >= config.SMTP_MAX_MESSAGES_PER_CONNECTION
+
+
+class SMTPConnectionPool:
+    """
+    Per-process pool of authenticated SMTP sessions.
+
+    Sessions are reused across messages and jobs instead of paying for the connect, STARTTLS and
+    login round trips on every email. An idle session is checked with NOOP before reuse and is
+    replaced when the server dropped it or it sent `SMTP_MAX_MESSAGES_PER_CONNECTION` messages.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.idle: list[PooledSMTPConnection] = []
+        self.lock = threading.Lock()
+
+    def create_connection(self) -> PooledSMTPConnection:
+        logger.debug(f"Opening SMTP connection to {config.SMTP_HOST}:{config.SMTP_PORT}")
+        client = smtplib.SMTP(config.SMTP_HOST, config.SMTP_PORT, timeout=config.SMTP_TIMEOUT_SECONDS)
+        try:
+            if config.SMTP_USE_TLS:
+                client.starttls()
+            if config.SMTP_USERNAME:
+                client.login(config.SMTP_USERNAME, config.SMTP_PASSWORD.get_secret_value())
+        except Exception:
+            self.close_connection(PooledSMTPConnection(client))
+            raise
+
+        return PooledSMTPConnection(client)
+
+    @staticmethod
+    def close_connection(connection: PooledSMTPConnection) -> None:
+        try:
+            connection.client.quit()
+        except Exception:
+            connection.client.close()
+
+    @staticmethod
+    def is_alive(connection: PooledSMTPConnection) -> bool:
+        if connection.idle_seconds < config.SMTP_POOL_CHECK_AFTER_SECONDS:
+            return True
+        try:
+            return connection.client.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def acquire(self) -> PooledSMTPConnection:
+        while True:
+            with self.lock:
+                connection = self.idle.pop() if self.idle else None
+            if connection is None:
+                return self.create_connection()
+            if self.is_alive(connection):
+                return connection
+            self.close_connection(connection)
+
+    def release(self, connection: PooledSMTPConnection) -> None:
+        connection.last_used_at = time.monotonic()
+        with self.lock:
+            if not connection.exhausted and len(self.idle) < self.max_size:
+                self.idle.append(connection)
+                return
+
+        self.close_connection(connection)
+
+    @contextmanager
+    def connection(self):
+        """
+        Check out a session for sending one or more messages. The session is discarded when
+        sending raised, since its state is unknown.
+        """
+        connection = self.acquire()
+        try:
+            yield connection
+        except Exception:
+            self.close_connection(connection)
+            raise
+
+        self.release(connection)
+
+    def close_all(self) -> None:
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for connection in idle:
+            self.close_connection(connection)
+
+
+smtp_connection_pool = SMTPConnectionPool(max_size=config.SMTP_POOL_SIZE)
+atexit.register(smtp_connection_pool.close_all)
+
+
 class SMTPHelper:
+    def send_message(
+        self,
+        connection: PooledSMTPConnection,
+        email_from: str,
+        email_to: list[str],
+        email_body: MIMEMultipart,
+    ):
+        connection.client.send_message(msg=email_body, from_addr=email_from, to_addrs=email_to)
+        connection.messages_sent += 1
+
+    def send_emails(self, messages: list[tuple[str, list[str], MIMEMultipart]]) -> list[bool]:
+        """
+        Send several emails over as few SMTP sessions as possible.
+
+        Args:
+            messages (list[tuple[str, list[str], MIMEMultipart]]): (email_from, email_to, email_body) tuples.
+
+        Returns:
+            list[bool]: Whether each message was sent, in the order of `messages`.
+
+        Raises:
+            SMTPBatchInterruptedException: If the server can't be reached or keeps dropping the session. Its
+                `results` cover the messages before the one that was being sent, which are not to be sent again.
+        """
+        results = []
+        pending = list(messages)
+        disconnects = 0
+        while pending:
+            try:
+                with smtp_connection_pool.connection() as connection:
+                    while pending and not connection.exhausted:
+                        email_from, email_to, email_body = pending[0]
+                        try:
+                            self.send_message(connection, email_from, email_to, email_body)
+                            results.append(True)
+                        except smtplib.SMTPServerDisconnected:
+                            raise
+                        except smtplib.SMTPException as e:
+                            logger.error(f"Failed to send email to {email_to}: {str(e)}")
+                            results.append(False)
+                        pending.pop(0)
+                        disconnects = 0
+            except smtplib.SMTPServerDisconnected as e:
+                # Retry the current message once on a new session
+                disconnects += 1
+                if disconnects > 1:
+                    raise SMTPBatchInterruptedException(str(e), results) from e
+                logger.warning(f"SMTP session dropped, retrying on a new session: {str(e)}")
+            except Exception as e:
+                raise SMTPBatchInterruptedException(str(e), results) from e
+
+        return results
+
     def send_email(
         self,
         email_from: str,
@@ -14,7 +185,7 @@ class SMTPHelper:
         email_body: MIMEMultipart,
     ) -> bool:
         """
-        Send an email using SMTP.
+        Send an email using a pooled SMTP session.
 
         Args:
             email_from (str): The sender's email address.
@@ -22,25 +193,20 @@ class SMTPHelper:
             email_body (MIMEMultipart): The email body as a MIMEMultipart object.
 
         Returns:
-            bool: True if the email was sent successfully, False otherwise.
+            bool: True once the email was sent.
 
         Raises:
-            smtplib.SMTPException: If there's an error during the SMTP operation.
+            smtplib.SMTPException: If the email couldn't be sent, so the caller can fall back to another transport.
+            OSError: If the server can't be reached.
         """
         logger.info(f"Sending email to {email_to} via SMTP")
-        try:
-            with smtplib.SMTP(config.SMTP_HOST, config.SMTP_PORT) as server:
-                server.starttls()
-                server.login(
-                    config.SMTP_USERNAME,
-                    config.SMTP_PASSWORD.get_secret_value(),
-                )
-                server.send_message(
-                    msg=email_body,
-                    from_addr=email_from,
-                    to_addrs=email_to,
-                )
-            return True
-        except smtplib.SMTPException as e:
-            logger.error(f"Failed to send email: {str(e)}")
-            return False
+        for attempt in range(2):
+            try:
+                with smtp_connection_pool.connection() as connection:
+                    self.send_message(connection, email_from, email_to, email_body)
+                return True
+            except smtplib.SMTPServerDisconnected as e:
+                # A pooled session can be dropped by the server between the NOOP check and the send
+                if attempt == 1:
+                    raise
+                logger.warning(f"SMTP session dropped, retrying on a new session: {str(e)}")
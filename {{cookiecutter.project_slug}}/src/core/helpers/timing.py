@@ -0,0 +1,70 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from src.core.helpers.tracing import tracing
+
+
+class RequestTimings:
+    """
+    Collects the time spent per phase (e.g. jwt, redis, cerbos, bcrypt) while serving a single request.
+    """
+
+    def __init__(self) -> None:
+        self.phases: dict[str, list[float | int]] = {}
+
+    def record(self, phase: str, duration: float) -> None:
+        timing = self.phases.setdefault(phase, [0.0, 0])
+        timing[0] += duration
+        timing[1] += 1
+
+    def items(self) -> list[tuple[str, float, int]]:
+        return [(phase, duration, count) for phase, (duration, count) in self.phases.items()]
+
+
+request_timings: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def timed(phase: str, metric=None, attributes: dict | None = None):
+    """
+    Add the time spent in the block to the given phase of the current request, and to the
+    metric when given. The block is also traced as a span named after the phase, inside a
+    recorded trace only, so e.g. the worker's Redis polling doesn't start a trace per command.
+    Outside of a request, without a metric and outside of a trace this does nothing.
+
+        with timed("cerbos", metric=CERBOS_REQUEST_DURATION.labels(action, resource_kind)):
+            allowed = await client.is_allowed(...)
+
+    Args:
+        phase (str): Name of the phase, reported in the Server-Timing header.
+        metric (optional): Prometheus histogram (or labelled child) observing the duration. Defaults to None.
+        attributes (dict | None, optional): Attributes of the span. Defaults to None.
+    """
+    timings = request_timings.get()
+    traced = tracing.is_recording()
+    if timings is None and metric is None and not traced:
+        yield
+        return
+
+    start_time = time.perf_counter()
+    try:
+        if traced:
+            with tracing.span(phase, attributes=attributes):
+                yield
+        else:
+            yield
+    finally:
+        duration = time.perf_counter() - start_time
+        if timings is not None:
+            timings.record(phase, duration)
+        if metric is not None:
+            metric.observe(duration)
+
+
+def record_timing(phase: str, duration: float) -> None:
+    """
+    Add an already measured duration, in seconds, to the given phase of the current request.
+    """
+    if timings := request_timings.get():
+        timings.record(phase, duration)
@@ -0,0 +1,137 @@
+import os
+from contextlib import contextmanager
+from datetime import datetime
+
+from loguru import logger
+from opentelemetry import propagate, trace
+from opentelemetry.context import Context
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExporter
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import Span, SpanKind
+
+from src.core.config import config
+from src.core.constants import TracingExporter
+
+tracer = trace.get_tracer("src")
+
+
+class Tracing:
+    """
+    OpenTelemetry tracing of the process, set up once per gunicorn or rq worker.
+
+    Until `setup` is called, or with `TRACING_EXPORTER=none`, spans are skipped altogether so
+    the hot paths don't pay for them.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.provider: TracerProvider | None = None
+
+    def get_exporter(self) -> SpanExporter:
+        if config.TRACING_EXPORTER == TracingExporter.OTLP:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+            return OTLPSpanExporter(endpoint=config.TRACING_OTLP_ENDPOINT)
+
+        # One JSON document per line, appended by every process
+        return ConsoleSpanExporter(
+            out=open(config.TRACING_FILE_PATH, "a", buffering=1),
+            formatter=lambda span: span.to_json(indent=None) + os.linesep,
+        )
+
+    def setup(self, component: str) -> None:
+        """
+        Export the spans of this process, after the worker process was forked.
+
+        Args:
+            component (str): Kind of process, e.g. app or worker, appended to the service name.
+        """
+        if self.enabled or config.TRACING_EXPORTER == TracingExporter.NONE:
+            return
+
+        resource = Resource.create(
+            {"service.name": f"{config.TRACING_SERVICE_NAME}-{component}", "process.pid": os.getpid()}
+        )
+        self.provider = TracerProvider(
+            resource=resource,
+            sampler=ParentBased(TraceIdRatioBased(config.TRACING_SAMPLE_RATIO)),
+        )
+        self.provider.add_span_processor(BatchSpanProcessor(self.get_exporter()))
+        trace.set_tracer_provider(self.provider)
+        self.enabled = True
+        logger.info(f"Exporting traces of {resource.attributes['service.name']} to {config.TRACING_EXPORTER}")
+
+    def shutdown(self) -> None:
+        # Flushes the spans still waiting in the batch processor
+        if self.provider is not None:
+            self.provider.shutdown()
+        self.enabled = False
+
+    def is_recording(self) -> bool:
+        """
+        Returns:
+            bool: Whether a recorded span, e.g. of a request or a job, is current, for the spans of
+                Redis commands and SQL statements that shouldn't start traces of their own.
+        """
+        return self.enabled and trace.get_current_span().is_recording()
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        kind: SpanKind = SpanKind.INTERNAL,
+        attributes: dict | None = None,
+        context: Context | None = None,
+    ):
+        """
+        Run the block in a span that is current for the spans started inside it. Exceptions
+        raised in the block are recorded on the span.
+
+        Args:
+            name (str): Name of the span.
+            kind (SpanKind, optional): Kind of the span. Defaults to SpanKind.INTERNAL.
+            attributes (dict | None, optional): Attributes of the span. Defaults to None.
+            context (Context | None, optional): Parent context, defaults to the current one.
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        with tracer.start_as_current_span(name, context=context, kind=kind, attributes=attributes) as span:
+            yield span
+
+    def start_span(
+        self,
+        name: str,
+        kind: SpanKind = SpanKind.INTERNAL,
+        attributes: dict | None = None,
+        context: Context | None = None,
+        start_time: datetime | None = None,
+    ) -> Span | None:
+        """
+        Start a span the caller ends, for work measured across callbacks, e.g. SQLAlchemy events.
+        """
+        if not self.enabled:
+            return None
+
+        start_time_ns = int(start_time.timestamp() * 1_000_000_000) if start_time else None
+        return tracer.start_span(name, context=context, kind=kind, attributes=attributes, start_time=start_time_ns)
+
+    def inject(self) -> dict[str, str]:
+        """
+        Returns:
+            dict[str, str]: The W3C trace context of the current span, to be carried by a job or request.
+        """
+        carrier = {}
+        if self.enabled:
+            propagate.inject(carrier)
+
+        return carrier
+
+    def extract(self, carrier: dict[str, str] | None) -> Context | None:
+        return propagate.extract(carrier) if self.enabled and carrier else None
+
+
+tracing = Tracing()
@@ -0,0 +1,61 @@
+import asyncio
+from datetime import datetime, timezone
+
+from loguru import logger
+from pyinstrument import Profiler
+from pyinstrument.renderers import SpeedscopeRenderer
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import config
+from src.core.helpers.profiling import new_profile_id, profile_store, profiling_slots, should_profile
+
+
+class ProfilingMiddleware:
+    """
+    Runs a sampling profiler for requests carrying an admin issued `X-Profile-Token` header, or
+    picked by `PROFILING_SAMPLE_RATE`, and stores the result as a speedscope profile. The id of
+    the profile is returned in the `X-Profile-Id` header.
+
+    Other requests only pay for a header lookup, and at most `PROFILING_MAX_CONCURRENT` requests
+    are profiled at once per process.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not should_profile(scope["headers"]) or not profiling_slots.acquire():
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = new_profile_id()
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+
+        profiler = Profiler(interval=config.PROFILING_INTERVAL_SECONDS, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.stop()
+            profiling_slots.release()
+            await asyncio.to_thread(self.save_profile, profiler, profile_id, scope)
+
+    @staticmethod
+    def save_profile(profiler: Profiler, profile_id: str, scope: Scope) -> None:
+        try:
+            summary = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "duration_ms": round(profiler.last_session.duration * 1000, 2),
+                "sample_count": profiler.last_session.sample_count,
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+            }
+            profile_store.save(profile_id, summary, profiler.output(renderer=SpeedscopeRenderer()))
+            logger.info(f"Stored profile {profile_id} of {scope['method']} {scope['path']}")
+        except Exception as e:
+            logger.error(f"Failed to store profile {profile_id}: {str(e)}")
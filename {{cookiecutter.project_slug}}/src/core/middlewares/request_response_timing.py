@@ -1,14 +1,74 @@
 import time
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from loguru import logger
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from src.core.helpers.loop_monitor import loop_lag_monitor
+from src.core.helpers.metrics import HTTP_REQUEST_DURATION
+from src.core.helpers.timing import RequestTimings, request_timings
+from src.database.instrumentation import RequestQueryStats, request_query_stats
 
-class RequestResponseTimingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+
+class RequestResponseTimingMiddleware:
+    """
+    Adds a Server-Timing header with the total time and a breakdown per phase: the database
+    statements, and the phases recorded with `timed`, e.g. jwt, redis, cerbos and bcrypt.
+
+    A plain ASGI middleware, so the request runs in the same task and the response body is
+    streamed through untouched. The request duration is also observed per route template, and
+    the request is named in the logs of the event loop lag monitor.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    @staticmethod
+    def get_server_timing(query_stats: RequestQueryStats, timings: RequestTimings, process_time: float) -> str:
+        metrics = [f'db;dur={query_stats.duration * 1000:.2f};desc="{query_stats.count} queries"']
+        for phase, duration, count in timings.items():
+            metrics.append(f'{phase};dur={duration * 1000:.2f};desc="{count} calls"')
+        metrics.append(f"total;dur={process_time * 1000:.2f}")
+
+        return ", ".join(metrics)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        query_stats = RequestQueryStats()
+        timings = RequestTimings()
+        query_stats_token = request_query_stats.set(query_stats)
+        timings_token = request_timings.set(timings)
+        loop_lag_monitor.track_request(scope)
         start_time = time.perf_counter()
-        response = await call_next(request)
-        process_time = time.perf_counter() - start_time
-        response.headers["X-Process-Time"] = f"{process_time:.5f} s"
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                process_time = time.perf_counter() - start_time
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Process-Time", f"{process_time:.5f} s")
+                headers.append("Server-Timing", self.get_server_timing(query_stats, timings, process_time))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            loop_lag_monitor.untrack_request()
+            request_query_stats.reset(query_stats_token)
+            request_timings.reset(timings_token)
+            # The router stores the matched route in the scope, raw paths would explode the label values
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(scope["method"], route, status_code).observe(time.perf_counter() - start_time)
 
-        return response
+        if query_stats.count:
+            logger.info(
+                f"{scope['method']} {scope['path']} issued {query_stats.count} queries "
+                f"in {query_stats.duration * 1000:.2f} ms"
+            )
+            for duration, statement in query_stats.get_slowest():
+                logger.debug(f"{duration * 1000:.2f} ms: {statement}")
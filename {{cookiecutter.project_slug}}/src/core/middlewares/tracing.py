@@ -0,0 +1,44 @@
+from opentelemetry.trace import SpanKind, StatusCode
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.helpers.tracing import tracing
+
+
+class TracingMiddleware:
+    """
+    Traces every request as a server span named after its route template, continuing the trace
+    of the caller when the request carries a `traceparent` header. The spans of the database,
+    Redis, Cerbos, JWT and bcrypt calls made while serving the request are its children.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not tracing.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+        attributes = {"http.request.method": scope["method"], "url.path": scope["path"]}
+        with tracing.span(
+            f"{scope['method']} {scope['path']}",
+            kind=SpanKind.SERVER,
+            attributes=attributes,
+            context=tracing.extract(headers),
+        ) as span:
+
+            async def send_with_status(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.response.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status(StatusCode.ERROR)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                # The router stores the matched route in the scope, raw paths would make every span name unique
+                if route := getattr(scope.get("route"), "path", None):
+                    span.update_name(f"{scope['method']} {route}")
+                    span.set_attribute("http.route", route)
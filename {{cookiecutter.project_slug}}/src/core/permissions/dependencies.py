@@ -5,6 +5,8 @@ from google.protobuf.struct_pb2 import Value
 
 from src.core.config import config
 from src.core.constants import ResourceActions
+from src.core.helpers.metrics import CERBOS_DECISIONS, CERBOS_REQUEST_DURATION
+from src.core.helpers.timing import timed
 from src.users.dependencies import get_current_user
 from src.users.models import User
 
@@ -35,14 +37,20 @@ class PermissionChecker:
         principal = self.get_principal(user=user)
         resource = self.get_resource(user=user)
 
-        async with AsyncCerbosClient(config.CERBOS_URL) as client:
-            action_allowed = await client.is_allowed(
-                action=self.action.value,
-                principal=principal,
-                resource=resource,
-            )
-            if not action_allowed:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="You are not authorized to perform this action.",
+        with timed(
+            "cerbos",
+            metric=CERBOS_REQUEST_DURATION.labels(self.action.value, self.resource_kind),
+            attributes={"cerbos.action": self.action.value, "cerbos.resource_kind": self.resource_kind},
+        ):
+            async with AsyncCerbosClient(config.CERBOS_URL) as client:
+                action_allowed = await client.is_allowed(
+                    action=self.action.value,
+                    principal=principal,
+                    resource=resource,
                 )
+        CERBOS_DECISIONS.labels(self.action.value, self.resource_kind, "allow" if action_allowed else "deny").inc()
+        if not action_allowed:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You are not authorized to perform this action.",
+            )
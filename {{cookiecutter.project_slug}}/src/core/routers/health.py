@@ -1,6 +1,11 @@
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Query, status
 from fastapi.responses import ORJSONResponse
 
+from src.core.helpers.circuit_breaker import ses_circuit_breaker, smtp_circuit_breaker
+from src.core.config import config
+from src.core.helpers.rq import job_stats
+from src.database.statement_cache import statement_cache_stats
+
 # health router configuration
 health_router = APIRouter(prefix="/health", tags=["Health"])
 
@@ -13,3 +18,52 @@ async def app_health() -> ORJSONResponse:
     This endpoint returns the status of the application.
     """
     return {"status": "ok"}
+
+
+# health check database statement caches
+@health_router.get("/db/", summary="Database Statement Cache Statistics", status_code=status.HTTP_200_OK)
+async def db_health() -> ORJSONResponse:
+    """
+    ### Database statement cache statistics
+    This endpoint returns the compiled statement and prepared statement cache hit ratios of the worker
+    that served the request.
+    """
+    return {"status": "ok", "statement_cache": statement_cache_stats.as_dict()}
+
+
+# health check email transport circuit breakers
+@health_router.get("/email/", summary="Email Transport Circuit Breakers", status_code=status.HTTP_200_OK)
+async def email_health() -> ORJSONResponse:
+    """
+    ### Email transport circuit breakers
+    This endpoint returns the state of the SMTP and SES circuit breakers shared by the workers,
+    with the number of consecutive failures and when the circuit was last opened.
+    """
+    return {
+        "status": "ok",
+        "circuit_breakers": {"smtp": smtp_circuit_breaker.as_dict(), "ses": ses_circuit_breaker.as_dict()},
+    }
+
+
+# health check background job queues
+@health_router.get("/queues/", summary="Background Job Queue Latency", status_code=status.HTTP_200_OK)
+async def queues_health(minutes: int = Query(default=5, ge=1, le=config.JOB_STATS_RETENTION_MINUTES)) -> ORJSONResponse:
+    """
+    ### Background job queue latency
+    This endpoint returns the number of queued jobs of every queue, and the average and percentile
+    enqueue-to-start latency of the jobs started in the last `minutes`. Percentiles are the upper
+    bounds of the wait histogram buckets they fall in, from the same stats as `/health/jobs/`.
+    """
+    return {"status": "ok", "queues": job_stats.get_queue_latency(minutes)}
+
+
+# health check background jobs over time
+@health_router.get("/jobs/", summary="Background Job Statistics Over Time", status_code=status.HTTP_200_OK)
+async def jobs_health(minutes: int = Query(default=60, ge=1, le=config.JOB_STATS_RETENTION_MINUTES)) -> ORJSONResponse:
+    """
+    ### Background job statistics over time
+    This endpoint returns, for every minute of the last `minutes` and every queue and job function,
+    the jobs enqueued, started, succeeded, failed and retried, the average wait and run times, and
+    the jobs that waited longer than the queue's wait SLO.
+    """
+    return {"status": "ok", "slo_seconds": config.JOB_WAIT_SLO_SECONDS, "series": job_stats.get_series(minutes)}
@@ -0,0 +1,85 @@
+from fastapi import APIRouter, Depends, Query, status
+
+from src.core.constants import ResourceActions
+from src.core.helpers.memory import memory_profiler
+from src.core.permissions.dependencies import PermissionChecker
+
+# memory diagnostics router configuration, admin only through the "memory" Cerbos policy.
+# Tracing and snapshots are per worker process, every response names the worker's pid
+memory_router = APIRouter(prefix="/memory", tags=["Memory Diagnostics"])
+
+
+@memory_router.get(
+    "/",
+    summary="Memory Status of the Worker",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(PermissionChecker(action=ResourceActions.GET, resource_kind="memory"))],
+)
+def get_memory_status() -> dict:
+    return memory_profiler.get_status()
+
+
+@memory_router.post(
+    "/tracing/start/",
+    summary="Start Memory Tracing",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(PermissionChecker(action=ResourceActions.UPDATE, resource_kind="memory"))],
+)
+def start_tracing(frames: int = Query(default=1, ge=1, le=25)) -> dict:
+    """
+    ### Start memory tracing
+    Traces allocations with the given number of frames per traceback. Tracing slows the worker
+    down and uses extra memory, stop it once the snapshots are taken.
+    """
+    return memory_profiler.start(frames=frames)
+
+
+@memory_router.post(
+    "/tracing/stop/",
+    summary="Stop Memory Tracing",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(PermissionChecker(action=ResourceActions.UPDATE, resource_kind="memory"))],
+)
+def stop_tracing() -> dict:
+    return memory_profiler.stop()
+
+
+@memory_router.post(
+    "/snapshots/",
+    summary="Take a Memory Snapshot",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(PermissionChecker(action=ResourceActions.CREATE, resource_kind="memory"))],
+)
+def take_snapshot() -> dict:
+    return memory_profiler.take_snapshot()
+
+
+@memory_router.get(
+    "/snapshots/{snapshot_id}/top/",
+    summary="Top Allocators of a Snapshot",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(PermissionChecker(action=ResourceActions.GET, resource_kind="memory"))],
+)
+def get_top_allocators(snapshot_id: str, limit: int = Query(default=20, ge=1, le=200)) -> list[dict]:
+    """
+    ### Top allocators
+    Retained memory of the snapshot grouped by module, `src.*` modules for the app's own code and
+    the package name for libraries.
+    """
+    return memory_profiler.top(snapshot_id, limit=limit)
+
+
+@memory_router.get(
+    "/snapshots/{first_snapshot_id}/diff/{second_snapshot_id}/",
+    summary="Compare Two Snapshots",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(PermissionChecker(action=ResourceActions.GET, resource_kind="memory"))],
+)
+def diff_snapshots(
+    first_snapshot_id: str, second_snapshot_id: str, limit: int = Query(default=20, ge=1, le=200)
+) -> list[dict]:
+    """
+    ### Compare two snapshots
+    Memory growth from the first to the second snapshot grouped by module, largest change first.
+    """
+    return memory_profiler.diff(first_snapshot_id, second_snapshot_id, limit=limit)
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Response, status
+
+from src.core.helpers.metrics import generate_metrics
+
+# metrics router configuration
+metrics_router = APIRouter(tags=["Metrics"])
+
+
+# Defined without async so rendering runs in the threadpool instead of blocking the event loop
+@metrics_router.get("/metrics", summary="Prometheus Metrics", status_code=status.HTTP_200_OK)
+def metrics() -> Response:
+    """
+    ### Prometheus metrics
+    This endpoint returns the metrics of every worker in the Prometheus text format.
+    """
+    content, content_type = generate_metrics()
+    return Response(content=content, media_type=content_type)
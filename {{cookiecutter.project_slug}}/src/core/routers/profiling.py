@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, Response, status
+
+from src.core.constants import ResourceActions
+from src.core.helpers.profiling import profile_store
+from src.core.permissions.dependencies import PermissionChecker
+from src.core.security.tokens import Tokens
+
+# profiling router configuration, admin only through the "profiles" Cerbos policy
+profiling_router = APIRouter(prefix="/profiles", tags=["Profiling"])
+
+
+@profiling_router.post(
+    "/tokens/",
+    summary="Issue a Profiling Token",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(PermissionChecker(action=ResourceActions.CREATE, resource_kind="profiles"))],
+)
+def create_profiling_token() -> dict:
+    """
+    ### Issue a profiling token
+    Requests sent with the token in the `X-Profile-Token` header are profiled until the token expires.
+    The id of each profile is returned in the `X-Profile-Id` response header.
+    """
+    return {"token": Tokens.create_profiling_token(), "header": "X-Profile-Token"}
+
+
+@profiling_router.get(
+    "/",
+    summary="List Recorded Profiles",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(PermissionChecker(action=ResourceActions.LIST, resource_kind="profiles"))],
+)
+def list_profiles() -> list[dict]:
+    return profile_store.list()
+
+
+@profiling_router.get(
+    "/{profile_id}/",
+    summary="Download a Profile",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(PermissionChecker(action=ResourceActions.GET, resource_kind="profiles"))],
+)
+def get_profile(profile_id: str) -> Response:
+    """
+    ### Download a profile
+    Returns the profile as a speedscope document, which can be opened at https://www.speedscope.app.
+    """
+    return Response(
+        content=profile_store.get(profile_id),
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.speedscope.json"'},
+    )
@@ -1,5 +1,8 @@
 import bcrypt
 
+from src.core.helpers.metrics import BCRYPT_DURATION
+from src.core.helpers.timing import timed
+
 
 class Password:
     @classmethod
@@ -13,8 +16,9 @@ class Password:
         Returns:
             str: The hashed password as a string.
         """
-        salt = bcrypt.gensalt()
-        password = bcrypt.hashpw(password.encode("utf-8"), salt)
+        with timed("bcrypt", metric=BCRYPT_DURATION.labels("hash")):
+            salt = bcrypt.gensalt()
+            password = bcrypt.hashpw(password.encode("utf-8"), salt)
 
         return password.decode("utf-8")
 
@@ -30,4 +34,5 @@ class Password:
         Returns:
             bool: True if the passwords match, False otherwise.
         """
-        return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+        with timed("bcrypt", metric=BCRYPT_DURATION.labels("verify")):
+            return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
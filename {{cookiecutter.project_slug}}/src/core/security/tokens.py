@@ -7,6 +7,7 @@ from jwt.exceptions import PyJWTError
 
 from src.core.config import config
 from src.core.constants import TokenType
+from src.core.helpers.timing import timed
 from src.core.security.exceptions import InvalidOrExpiredTokenException, InvalidTokenTypeException
 
 
@@ -91,6 +92,22 @@ class Tokens:
             data=data,
         )
 
+    @classmethod
+    def create_profiling_token(cls, expires_delta: timedelta | None = None) -> str:
+        """
+        Create a profiling token with the given expiration time.
+
+        Args:
+            expires_delta (timedelta | None): The expiration time for the token.
+
+        Returns:
+            str: The encoded JWT profiling token.
+        """
+        return cls.create_token(
+            token_type=TokenType.PROFILING.value,
+            expires_delta=expires_delta or timedelta(seconds=config.PROFILING_TOKEN_TTL_SECONDS),
+        )
+
     @classmethod
     def decode_token(cls, token: str) -> dict:
         """
@@ -102,12 +119,13 @@ class Tokens:
         Returns:
             dict: The decoded token claims.
         """
-        return jwt.decode(
-            jwt=token,
-            key=config.JWT_SECRET_KEY.get_secret_value(),
-            algorithms=[config.JWT_ALGORITHM],
-            options={"require_exp": True, "require_jti": True, "require_iat": True},
-        )
+        with timed("jwt"):
+            return jwt.decode(
+                jwt=token,
+                key=config.JWT_SECRET_KEY.get_secret_value(),
+                algorithms=[config.JWT_ALGORITHM],
+                options={"require_exp": True, "require_jti": True, "require_iat": True},
+            )
 
     @classmethod
     def verify_token(cls, token: str):
@@ -1,11 +1,12 @@
-from typing import Sequence, Type, TypeVar
+from typing import Any, Sequence, Type, TypeVar
 from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import func, inspect, lambda_stmt, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm.attributes import InstrumentedAttribute
+from sqlalchemy.orm.attributes import InstrumentedAttribute, set_committed_value
 
 from src.database.base_class import Base
+from src.database.write_behind import write_behind_buffer
 
 ModelType = TypeVar("ModelType", bound=Base)
 
@@ -54,6 +55,26 @@ class CRUDBase:
 
         return result.scalar_one_or_none()
 
+    async def get_by_field(self, db: AsyncSession, field: InstrumentedAttribute, value: Any) -> ModelType | None:
+        """
+        Get a specific record by a single column equality check.
+        The statement is built with `lambda_stmt`, so its construction and compiled SQL are
+        cached per (model, field) and only the value is bound on every call. Prefer this
+        over `get_by_filters` for lookups on the hot path.
+        Args:
+            db (AsyncSession): Database session
+            field (InstrumentedAttribute): Column to match on, e.g. `User.email`
+            value (Any): Value the column must be equal to
+        Returns:
+            Instance of the ModelType if found, else None
+        """
+        model = self.model
+        query = lambda_stmt(lambda: select(model))
+        query += lambda s: s.where(field == value)
+        result = await db.execute(query)
+
+        return result.scalar_one_or_none()
+
     async def filter(
         self,
         db: AsyncSession,
@@ -131,6 +152,23 @@ class CRUDBase:
         db.add(obj)
         return obj
 
+    def update_obj_deferred(self, obj: ModelType, **values: Any) -> ModelType:
+        """
+        Update non-critical columns of the record through the write-behind buffer instead of
+        the current transaction. The values are visible on the object right away but only reach
+        the database with the next batched flush, so use it only for fields nobody reads in real time.
+        Args:
+            obj (ModelType): Instance of the ModelType
+            **values: Column names and their new values
+        Returns:
+            ModelType: Instance of the ModelType with the updated values
+        """
+        for key, value in values.items():
+            # Set without marking the object dirty, so a later commit doesn't write it as well
+            set_committed_value(obj, key, value)
+        write_behind_buffer.update(self.model, inspect(obj).identity[0], **values)
+        return obj
+
     async def remove_obj(self, db: AsyncSession, obj: ModelType) -> ModelType:
         """
         Delete a specific record by instance.
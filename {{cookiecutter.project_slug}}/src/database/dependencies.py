@@ -1,6 +1,6 @@
 from typing import AsyncGenerator
 
-from src.database.session import AsyncSessionLocal
+from src.database.session import AsyncReadOnlySessionLocal, AsyncSessionLocal
 
 
 async def get_db() -> AsyncGenerator:
@@ -9,3 +9,13 @@ async def get_db() -> AsyncGenerator:
     """
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_db_readonly() -> AsyncGenerator:
+    """
+    Returns an async generator object that provides an asynchronous database session for reads.
+    Reads are routed to a replica, and go to the primary when no replica is healthy or once
+    the request has written.
+    """
+    async with AsyncReadOnlySessionLocal() as session:
+        yield session
@@ -0,0 +1,151 @@
+import heapq
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from loguru import logger
+from opentelemetry.trace import SpanKind, StatusCode
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.core.config import config
+from src.core.constants import Environment
+from src.core.helpers.metrics import DB_POOL_CHECKED_OUT, DB_POOL_OVERFLOW, DB_POOL_WAIT
+from src.core.helpers.tracing import tracing
+
+
+class NPlusOneQueryException(Exception):
+    """Raised outside production when the same statement repeats too often within one request."""
+
+
+class RequestQueryStats:
+    """
+    Collects the SQL statements issued while serving a single request.
+    """
+
+    # Number of slowest statements kept per request
+    slowest_limit = 3
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.slowest: list[tuple[float, str]] = []
+        self.shapes: Counter[str] = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement] += 1
+
+        if len(self.slowest) < self.slowest_limit:
+            heapq.heappush(self.slowest, (duration, statement))
+        else:
+            heapq.heappushpop(self.slowest, (duration, statement))
+
+        if duration * 1000 >= config.DB_SLOW_QUERY_THRESHOLD_MS:
+            logger.warning(f"Slow query ({duration * 1000:.2f} ms): {statement}")
+
+        self.detect_n_plus_one(statement)
+
+    def detect_n_plus_one(self, statement: str) -> None:
+        if config.ENVIRONMENT == Environment.PRODUCTION or not config.DB_N_PLUS_ONE_THRESHOLD:
+            return
+
+        # Only report once per statement shape, when the threshold is first reached
+        if self.shapes[statement] != config.DB_N_PLUS_ONE_THRESHOLD:
+            return
+
+        message = f"Possible N+1 query, statement repeated {self.shapes[statement]} times in one request: {statement}"
+        if config.DB_N_PLUS_ONE_RAISE:
+            raise NPlusOneQueryException(message)
+        logger.warning(message)
+
+    def get_slowest(self) -> list[tuple[float, str]]:
+        return sorted(self.slowest, reverse=True)
+
+
+request_query_stats: ContextVar[RequestQueryStats | None] = ContextVar("request_query_stats", default=None)
+
+
+def register_query_instrumentation(engine: AsyncEngine) -> None:
+    """
+    Record every statement executed on the engine into the current request's `RequestQueryStats`,
+    and trace it as a span of the current trace when one is recorded.
+
+    Args:
+        engine (AsyncEngine): Engine whose executions should be recorded
+    """
+
+    span_attributes = {"db.system": "postgresql", "db.namespace": engine.url.database}
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+        # Statements outside of a request or job, e.g. write-behind flushes, don't start traces
+        if tracing.is_recording():
+            span = tracing.start_span(
+                f"db {statement.split(None, 1)[0].upper()}",
+                kind=SpanKind.CLIENT,
+                attributes={**span_attributes, "db.query.text": statement},
+            )
+            conn.info.setdefault("query_spans", []).append(span)
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_start_time"].pop()
+        if conn.info.get("query_spans"):
+            conn.info["query_spans"].pop().end()
+        if stats := request_query_stats.get():
+            stats.record(statement, duration)
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(context):
+        if context.connection is None:
+            return
+        if context.connection.info.get("query_start_time"):
+            context.connection.info["query_start_time"].pop()
+        if context.connection.info.get("query_spans"):
+            span = context.connection.info["query_spans"].pop()
+            span.record_exception(context.original_exception)
+            span.set_status(StatusCode.ERROR)
+            span.end()
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long each checkout waits for a connection, including opening
+    a new one when the pool has room to grow.
+    """
+
+    metrics_label = "default"
+
+    def _do_get(self):
+        start_time = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.labels(self.metrics_label).observe(time.perf_counter() - start_time)
+
+
+def register_pool_metrics(engine: AsyncEngine) -> None:
+    """
+    Keep the checked out and overflow gauges of the engine's pool up to date.
+
+    Args:
+        engine (AsyncEngine): Engine whose pool should be reported
+    """
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, InstrumentedAsyncAdaptedQueuePool):
+        return
+
+    label = f"{engine.url.host}:{engine.url.port}/{engine.url.database}"
+    pool.metrics_label = label
+
+    def update_gauges(*args) -> None:
+        DB_POOL_CHECKED_OUT.labels(label).set(pool.checkedout())
+        # The overflow counter starts at -pool_size until the pool is full
+        DB_POOL_OVERFLOW.labels(label).set(max(pool.overflow(), 0))
+
+    event.listen(pool, "checkout", update_gauges)
+    event.listen(pool, "checkin", update_gauges)
@@ -0,0 +1,144 @@
+import time
+from contextvars import ContextVar
+from threading import Lock
+
+from loguru import logger
+from sqlalchemy import Delete, Insert, Update, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+# Set once the current request has written through any session, so that every following read in
+# the same request goes to the primary and sees its own writes
+primary_pinned: ContextVar[bool] = ContextVar("primary_pinned", default=False)
+
+
+class ReplicaRouter:
+    """
+    Picks a read replica using smooth weighted round robin.
+
+    A replica that fails to connect is skipped for `retry_after_seconds`, and the primary is
+    returned whenever no replica is configured or healthy.
+    """
+
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replicas: list[AsyncEngine],
+        weights: list[int],
+        retry_after_seconds: int,
+    ) -> None:
+        self.primary = primary
+        self.replicas = replicas
+        self.weights = weights
+        self.retry_after_seconds = retry_after_seconds
+        self.current_weights = [0] * len(replicas)
+        self.down_until = [0.0] * len(replicas)
+        self.lock = Lock()
+
+        for replica in replicas:
+            event.listen(replica.sync_engine, "handle_error", self.handle_error)
+
+    def choose(self) -> AsyncEngine:
+        """
+        Returns:
+            AsyncEngine: The next healthy replica, or the primary if there is none.
+        """
+        now = time.monotonic()
+        with self.lock:
+            healthy = [index for index, down_until in enumerate(self.down_until) if down_until <= now]
+            if not healthy:
+                return self.primary
+
+            total_weight = 0
+            best = healthy[0]
+            for index in healthy:
+                self.current_weights[index] += self.weights[index]
+                total_weight += self.weights[index]
+                if self.current_weights[index] > self.current_weights[best]:
+                    best = index
+            self.current_weights[best] -= total_weight
+
+        return self.replicas[best]
+
+    def mark_down(self, engine: Engine) -> None:
+        for index, replica in enumerate(self.replicas):
+            if replica.sync_engine is engine:
+                logger.warning(f"Replica {engine.url.host} is down, skipping it for {self.retry_after_seconds} seconds")
+                with self.lock:
+                    self.down_until[index] = time.monotonic() + self.retry_after_seconds
+
+    def is_down(self, engine: AsyncEngine) -> bool:
+        for index, replica in enumerate(self.replicas):
+            if replica is engine:
+                with self.lock:
+                    return self.down_until[index] > time.monotonic()
+
+        return False
+
+    def handle_error(self, context) -> None:
+        # `connection` is None when the error happened while connecting
+        if context.is_disconnect or context.connection is None:
+            self.mark_down(context.engine)
+
+
+class RoutingSession(Session):
+    """
+    Session that reads from a replica picked by the `ReplicaRouter` and sends flushes, DML and
+    every statement issued after the request wrote to the primary.
+
+    The replica is chosen once per session so that a session never spreads one transaction
+    over several replicas. When the first read of the session fails because the replica is
+    down, the read is retried once on the primary, which the rest of the session then uses.
+    """
+
+    def __init__(self, *args, router: ReplicaRouter, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.router = router
+        self.replica: AsyncEngine | None = None
+        self.has_read = False
+
+    def can_fail_over(self) -> bool:
+        # Later reads could depend on rows already loaded from the replica, which the rollback expires
+        return (
+            not self.has_read
+            and self.replica is not None
+            and self.replica is not self.router.primary
+            and self.router.is_down(self.replica)
+        )
+
+    def execute(self, statement, *args, **kwargs):
+        # Also runs the statements of `get`, and of `execute` and `scalars` on the AsyncSession
+        try:
+            result = super().execute(statement, *args, **kwargs)
+        except Exception:
+            if not self.can_fail_over():
+                raise
+
+            logger.warning(f"Retrying the read on the primary, replica {self.replica.url.host} is down")
+            self.rollback()
+            self.replica = self.router.primary
+            result = super().execute(statement, *args, **kwargs)
+
+        self.has_read = True
+        return result
+
+    def get_bind(self, mapper=None, clause=None, **kwargs) -> Engine:
+        if self._flushing or primary_pinned.get() or isinstance(clause, (Insert, Update, Delete)):
+            return self.router.primary.sync_engine
+
+        if self.replica is None:
+            self.replica = self.router.choose()
+
+        return self.replica.sync_engine
+
+
+@event.listens_for(Session, "after_flush")
+def pin_after_flush(session, flush_context) -> None:
+    primary_pinned.set(True)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def pin_after_dml(orm_execute_state) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        primary_pinned.set(True)
@@ -1,26 +1,107 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 
 from src.core.config import config
+from src.database.instrumentation import (
+    InstrumentedAsyncAdaptedQueuePool,
+    register_pool_metrics,
+    register_query_instrumentation,
+)
+from src.database.routing import ReplicaRouter, RoutingSession
+from src.database.statement_cache import register_statement_cache_listeners
 
 # echo = config.ENVIRONMENT == Environment.LOCAL
 echo = False
 
+
+def get_prepared_statement_name() -> str:
+    # Unique names can't collide with statements another client prepared on the same PgBouncer server connection
+    return f"__asyncpg_{uuid4().hex}__"
+
+
+def get_pool_options() -> dict:
+    """
+    Pool settings for the engine, without pooling when DB_POOL_SIZE is 0.
+    """
+    if config.DB_POOL_SIZE == 0:
+        # Every checkout opens a fresh connection, so pinging it first would only add a round trip
+        return {"poolclass": NullPool, "pool_pre_ping": False}
+
+    return {
+        # Records pool wait times, otherwise the default pool of async engines
+        "poolclass": InstrumentedAsyncAdaptedQueuePool,
+        # Enable connection health checks before returning connections from the pool
+        "pool_pre_ping": True,
+        # Set the number of connections to keep open in the pool
+        "pool_size": config.DB_POOL_SIZE,
+        # Allow additional connections beyond pool_size for short bursts
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        # Maximum time (in seconds) to wait for a connection to become available
+        "pool_timeout": 30,  # Prevents hanging indefinitely if the pool is exhausted
+        # Time (in seconds) after which connections are recycled to avoid stale connections
+        "pool_recycle": 1800,  # Recycle connections every 30 minutes
+    }
+
+
+def get_connect_args() -> dict:
+    """
+    asyncpg connection arguments, adjusted for PgBouncer transaction pooling when enabled.
+    """
+    if config.DB_PGBOUNCER_MODE:
+        return {
+            # A prepared statement only lives on the server connection it was prepared on,
+            # so neither SQLAlchemy nor asyncpg may reuse one across transactions
+            "prepared_statement_cache_size": 0,
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": get_prepared_statement_name,
+        }
+
+    # Number of asyncpg prepared statements kept per connection so Postgres skips parse/plan
+    return {"prepared_statement_cache_size": config.DB_PREPARED_STATEMENT_CACHE_SIZE}
+
+
+def get_async_engine(url: str) -> AsyncEngine:
+    """
+    Create an engine for the given database url with the shared pool and cache settings.
+    """
+    engine = create_async_engine(
+        url=url,
+        # Control SQLAlchemy's logging of all SQL statements
+        echo=echo,
+        # Number of compiled SQL strings kept so repeated statements skip Python-side compilation
+        query_cache_size=config.DB_QUERY_CACHE_SIZE,
+        connect_args=get_connect_args(),
+        **get_pool_options(),
+    )
+    register_statement_cache_listeners(engine)
+    register_query_instrumentation(engine)
+    register_pool_metrics(engine)
+
+    return engine
+
+
 # an Engine, which the Session will use for connection resources
-async_engine = create_async_engine(
-    url=str(config.DB_URL),
-    # Enable connection health checks before returning connections from the pool
-    pool_pre_ping=True,
-    # Control SQLAlchemy's logging of all SQL statements
-    echo=echo,
-    # Set the number of connections to keep open in the pool
-    pool_size=20,
-    # Allow additional connections beyond pool_size for short bursts
-    max_overflow=30,
-    # Maximum time (in seconds) to wait for a connection to become available
-    pool_timeout=30,  # Prevents hanging indefinitely if the pool is exhausted
-    # Time (in seconds) after which connections are recycled to avoid stale connections
-    pool_recycle=1800,  # Recycle connections every 30 minutes
+async_engine = get_async_engine(str(config.DB_URL))
+
+# Read replicas, reads fall back to the primary when none are configured
+replica_engines = [get_async_engine(str(url)) for url in config.DB_REPLICA_URLS]
+replica_router = ReplicaRouter(
+    primary=async_engine,
+    replicas=replica_engines,
+    weights=config.DB_REPLICA_WEIGHTS,
+    retry_after_seconds=config.DB_REPLICA_RETRY_AFTER_SECONDS,
 )
 
 
 AsyncSessionLocal = async_sessionmaker(bind=async_engine, autocommit=False, autoflush=False, expire_on_commit=False)
+
+AsyncReadOnlySessionLocal = async_sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    router=replica_router,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+)
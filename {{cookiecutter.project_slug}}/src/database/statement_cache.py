@@ -0,0 +1,84 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class StatementCacheStats:
+    """
+    Tracks how often statements are served from SQLAlchemy's compiled cache and from
+    asyncpg's per-connection prepared statement cache.
+
+    The counters are kept per process, so every gunicorn worker reports its own numbers.
+    """
+
+    def __init__(self) -> None:
+        self.engines: list[AsyncEngine] = []
+        self.reset()
+
+    def reset(self) -> None:
+        self.compiled_hits = 0
+        self.compiled_misses = 0
+        self.compiled_uncached = 0
+        self.prepared_hits = 0
+        self.prepared_misses = 0
+
+    def record_compiled(self, context: ExecutionContext) -> None:
+        cache_hit = getattr(context, "cache_hit", None)
+        if cache_hit is context.dialect.CACHE_HIT:
+            self.compiled_hits += 1
+        elif cache_hit is context.dialect.CACHE_MISS:
+            self.compiled_misses += 1
+        else:
+            self.compiled_uncached += 1
+
+    def record_prepared(self, conn: Connection, statement: str) -> None:
+        # The asyncpg adapter keeps an LRU of prepared statements keyed on the SQL string
+        dbapi_connection = conn.connection.dbapi_connection
+        prepared_statement_cache = getattr(dbapi_connection, "_prepared_statement_cache", None)
+        if prepared_statement_cache is None:
+            return
+
+        if statement in prepared_statement_cache:
+            self.prepared_hits += 1
+        else:
+            self.prepared_misses += 1
+
+    @staticmethod
+    def ratio(hits: int, misses: int) -> float | None:
+        total = hits + misses
+        return round(hits / total, 4) if total else None
+
+    def as_dict(self) -> dict:
+        return {
+            "compiled_cache": {
+                "hits": self.compiled_hits,
+                "misses": self.compiled_misses,
+                "uncached": self.compiled_uncached,
+                "hit_ratio": self.ratio(self.compiled_hits, self.compiled_misses),
+                "entries": sum(len(engine.sync_engine._compiled_cache or {}) for engine in self.engines),
+            },
+            "prepared_statement_cache": {
+                "hits": self.prepared_hits,
+                "misses": self.prepared_misses,
+                "hit_ratio": self.ratio(self.prepared_hits, self.prepared_misses),
+            },
+        }
+
+
+statement_cache_stats = StatementCacheStats()
+
+
+def register_statement_cache_listeners(engine: AsyncEngine) -> None:
+    """
+    Attach the statement cache counters to the given engine.
+
+    Args:
+        engine (AsyncEngine): Engine whose executions should be tracked
+    """
+    statement_cache_stats.engines.append(engine)
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            statement_cache_stats.record_compiled(context)
+        statement_cache_stats.record_prepared(conn, statement)
@@ -0,0 +1,135 @@
+import asyncio
+from collections import defaultdict
+from typing import Any, Type
+
+from loguru import logger
+from sqlalchemy import column, inspect, update, values
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.core.config import config
+from src.database.base_class import Base
+from src.database.session import async_engine
+
+
+class WriteBehindBuffer:
+    """
+    Buffers non-critical column updates, e.g. `User.last_login`, and writes them in batches
+    outside the request path.
+
+    Only the latest value per (model, primary key, column) is kept. Pending updates are flushed
+    every `flush_interval_seconds`, as soon as `max_pending` rows are waiting, and once more when
+    the application shuts down. Each flush issues one `UPDATE ... FROM (VALUES ...)` statement per
+    model and set of columns.
+    """
+
+    def __init__(self, engine: AsyncEngine, flush_interval_seconds: float, max_pending: int) -> None:
+        self.engine = engine
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_pending = max_pending
+        self.pending: dict[Type[Base], dict[Any, dict[str, Any]]] = defaultdict(dict)
+        self.flush_requested = asyncio.Event()
+        self.flush_lock = asyncio.Lock()
+        self.task: asyncio.Task | None = None
+        self.stopping = False
+
+    @property
+    def pending_count(self) -> int:
+        return sum(len(rows) for rows in self.pending.values())
+
+    def update(self, model: Type[Base], pk: Any, **column_values: Any) -> None:
+        """
+        Queue column values for the row with the given primary key, replacing older queued values.
+
+        Args:
+            model (Type[Base]): SQLAlchemy model class
+            pk (Any): Primary key of the row to update
+            **column_values: Column names and their new values
+        """
+        self.pending[model].setdefault(pk, {}).update(column_values)
+
+        if self.pending_count >= self.max_pending:
+            self.flush_requested.set()
+
+    def build_statements(self, pending: dict[Type[Base], dict[Any, dict[str, Any]]]) -> list:
+        statements = []
+        for model, rows in pending.items():
+            table = model.__table__
+            pk_column = inspect(model).primary_key[0]
+
+            # Rows can only share a VALUES list when they update the same columns
+            rows_by_columns = defaultdict(list)
+            for pk, column_values in rows.items():
+                column_names = tuple(sorted(column_values))
+                rows_by_columns[column_names].append((pk, *(column_values[name] for name in column_names)))
+
+            for column_names, data in rows_by_columns.items():
+                pending_values = values(
+                    column(pk_column.name, pk_column.type),
+                    *(column(name, table.c[name].type) for name in column_names),
+                    name="pending",
+                ).data(data)
+                statement = (
+                    update(table)
+                    .where(table.c[pk_column.name] == pending_values.c[pk_column.name])
+                    .values({name: pending_values.c[name] for name in column_names})
+                )
+                statements.append(statement)
+
+        return statements
+
+    async def flush(self) -> None:
+        """
+        Write every pending update to the primary database.
+        """
+        async with self.flush_lock:
+            if not self.pending:
+                return
+
+            pending, self.pending = self.pending, defaultdict(dict)
+            try:
+                async with self.engine.begin() as connection:
+                    for statement in self.build_statements(pending):
+                        await connection.execute(statement)
+            except Exception as e:
+                logger.error(f"[{self.__class__.__name__}] Failed to flush pending updates: {e}")
+                # Requeue the failed values unless a newer value arrived in the meantime
+                for model, rows in pending.items():
+                    for pk, column_values in rows.items():
+                        newer_values = self.pending[model].get(pk, {})
+                        self.pending[model][pk] = {**column_values, **newer_values}
+                return
+
+            logger.debug(f"[{self.__class__.__name__}] Flushed {sum(len(rows) for rows in pending.values())} rows")
+
+    async def run(self) -> None:
+        while not self.stopping:
+            try:
+                await asyncio.wait_for(self.flush_requested.wait(), timeout=self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self.flush_requested.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        if self.task is None:
+            self.stopping = False
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """
+        Stop the background flushes and write whatever is still pending.
+        """
+        if self.task is not None:
+            self.stopping = True
+            self.flush_requested.set()
+            await self.task
+            self.task = None
+
+        await self.flush()
+
+
+write_behind_buffer = WriteBehindBuffer(
+    engine=async_engine,
+    flush_interval_seconds=config.WRITE_BEHIND_FLUSH_INTERVAL_SECONDS,
+    max_pending=config.WRITE_BEHIND_MAX_PENDING,
+)
@@ -6,7 +6,9 @@ from src.core.constants import Environment
 from src.core.event_handlers.lifespan import lifespan
 from src.core.exception_handlers.http import http_exception_handler
 from src.core.helpers.rq import dashboard
+from src.core.middlewares.profiling import ProfilingMiddleware
 from src.core.middlewares.request_response_timing import RequestResponseTimingMiddleware
+from src.core.middlewares.tracing import TracingMiddleware
 from src.core.responses.default import DefaultResponse
 from src.core.routers.api import router_with_auth, router_without_auth
 
@@ -22,9 +24,15 @@ app = FastAPI(
 # Mount EQ dashboard
 app.mount("/rq", dashboard)
 
+# Add on-demand profiling middleware
+app.add_middleware(ProfilingMiddleware)
+
 # Add custom timing middleware
 app.add_middleware(RequestResponseTimingMiddleware)
 
+# Add tracing middleware, around the timing and profiling middlewares so the request span covers them
+app.add_middleware(TracingMiddleware)
+
 # Add custom exception handler
 app.add_exception_handler(HTTPException, http_exception_handler)
 
@@ -37,7 +45,7 @@ if config.ALLOWED_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
-        expose_headers=["X-Process-Time"],
+        expose_headers=["X-Process-Time", "Server-Timing", "X-Profile-Id"],
     )
 
 app.include_router(router_without_auth, prefix=config.API_PREFIX)
@@ -1,36 +1,38 @@
-import inspect
-import os
-
-from jinja2 import BaseLoader, Environment
+from jinja2 import Template
 from loguru import logger
+from rq import Queue
 
 from src.core.config import config
+from src.core.constants import TaskQueue
 from src.core.helpers.email import EmailHelper
-from src.core.helpers.rq import queue
+from src.core.helpers.rq import get_queue, get_trace_meta, record_enqueued
 
 
 class EmailBase:
-    """Base class for email-related operations."""
+    """
+    Base class for email-related operations.
 
-    def get_template(self) -> str:
-        """
-        Read and return the contents of a template file.
+    Subclasses set `queue_name` to the queue `send_email` enqueues on, `TaskQueue.CRITICAL` for
+    emails a user is waiting on, and `coalesce = True` when a newer email to the same recipients
+    supersedes the ones still queued, e.g. a fresh verification code or reset link.
+    """
 
-        Args:
-            template_file_path (str): Path to the template file.
+    queue_name = TaskQueue.DEFAULT
+    coalesce = False
+
+    def get_template(self) -> Template:
+        """
+        Return the compiled template of the email class.
 
         Returns:
-            str: Contents of the template file.
+            Template: Compiled template from the shared template registry.
         """
         if self.__class__.__name__ == "EmailBase":
             raise NotImplementedError("Need to invoke the function on the inherited class")
 
-        file_path = inspect.getfile(self.__class__)
-        template_file_path = os.path.join(os.path.dirname(file_path), "template.html")
-        with open(template_file_path, "r") as f:
-            template = f.read()
+        from src.notifications.email.registry import email_template_registry
 
-        return template
+        return email_template_registry.get_template(self.__class__)
 
     def get_subject(self) -> str:
         """
@@ -41,27 +43,37 @@ class EmailBase:
         """
         return getattr(self.__class__, "subject", self.__class__.__name__)
 
-    def render_template(self, template: str, config: dict) -> str:
+    def validate_config(self, config: dict) -> dict:
+        """
+        Validate the configuration against the email's schema.
+
+        Args:
+            config (dict): The configuration dictionary for template rendering.
+
+        Returns:
+            dict: The validated configuration, serialized to JSON compatible types.
+        """
+        schema = getattr(self.__class__, "schema", None)
+        if not schema:
+            return {}
+
+        logger.info(f"[{self.__class__.__name__}] Validating config")
+        return schema.model_validate(config).model_dump(mode="json")
+
+    def render_template(self, template: Template, config: dict) -> str:
         """
         Render the given template with the provided configuration.
 
         Args:
-            template (str): The template string to render.
+            template (Template): The compiled template to render.
             config (dict): The configuration dictionary for template rendering.
 
         Returns:
             str: The rendered template.
         """
         logger.info(f"[{self.__class__.__name__}] Rendering template")
-        validated_data = {}
-        if schema := getattr(self.__class__, "schema", None):
-            logger.info(f"[{self.__class__.__name__}] Validating config")
-            validated_data = schema.model_validate(config)
-            validated_data = validated_data.model_dump(mode="json")
-
-        env = Environment(loader=BaseLoader())
-        jinja_template = env.from_string(template)
-        rendered_template = jinja_template.render(**validated_data)
+        validated_data = self.validate_config(config)
+        rendered_template = template.render(**validated_data)
 
         return rendered_template
 
@@ -90,25 +102,117 @@ class EmailBase:
         """
         Send an email with the specified parameters.
 
+        With `EMAIL_RENDER_IN_WORKER` enabled only the validated body config is enqueued and the
+        worker renders the template, otherwise the rendered body is enqueued.
+
+        The same email to the same recipients is enqueued once within `EMAIL_DEDUP_TTL_SECONDS`.
+        For coalescing classes the worker skips queued emails superseded by a newer one, which
+        needs `EMAIL_RENDER_IN_WORKER`. The job carries the current trace context, so the worker's
+        spans join the trace of the request that sent the email.
+
         Args:
-            email_from (str): Sender's email address.
             email_to (str | list[str]): Recipient email address(es).
             body_config (dict): Configuration for rendering the email body template.
             attachments (list[dict[str,str]] | None, optional): List of s3 paths to attach. Defaults to None.
 
         Returns:
-            bool: True if email was sent successfully, False otherwise.
+            bool: True if the email was enqueued, False if it was dropped as a duplicate.
         """
+        from src.notifications.email.dedup import email_deduplicator
+
         self = cls()
+        email_to = [email_to] if isinstance(email_to, str) else email_to
+        validated_config = self.validate_config(body_config or {})
+
+        digest = email_deduplicator.get_digest(validated_config, attachments)
+        if not email_deduplicator.claim(cls.__name__, email_to, digest, coalesce=cls.coalesce):
+            logger.info(f"[{cls.__name__}] Dropping duplicate email to {email_to}")
+            return False
+
+        if config.EMAIL_RENDER_IN_WORKER:
+            from src.notifications.jobs.send_email import SendEmail
+
+            job = get_queue(cls.queue_name).enqueue(
+                SendEmail().run,
+                email_class=cls.__name__,
+                email_to=email_to,
+                body_config=validated_config,
+                attachments=attachments,
+                digest=digest if cls.coalesce else None,
+                meta=get_trace_meta(),
+            )
+            record_enqueued([job])
+            return True
+
         body = self.get_rendered_template(body_config or {})
         email_subject = self.get_subject()
-        email_to = [email_to] if isinstance(email_to, str) else email_to
 
-        queue.enqueue(
+        job = get_queue(cls.queue_name).enqueue(
             EmailHelper().send_email,
             email_from=config.SMTP_EMAIL_FROM,
             email_to=email_to,
             email_subject=email_subject,
             email_body=body,
             attachments=attachments,
+            meta=get_trace_meta(),
+        )
+        record_enqueued([job])
+        return True
+
+    @classmethod
+    def send_many(
+        cls,
+        recipients_with_configs: list[tuple[str | list[str], dict | None]],
+        attachments: list[dict[str, str]] | None = None,
+    ):
+        """
+        Send the email to many recipients, each with their own body config.
+
+        The configs are validated up front and enqueued on the bulk queue in batches of
+        `EMAIL_BATCH_SIZE` with a single pipelined round trip to Redis. Each batch is rendered
+        and sent by one job, which reuses transport sessions across the whole batch. Duplicates
+        of emails sent within `EMAIL_DEDUP_TTL_SECONDS` are dropped, as with `send_email`.
+
+        Args:
+            recipients_with_configs (list[tuple[str | list[str], dict | None]]): (email_to, body_config) pairs.
+            attachments (list[dict[str,str]] | None, optional): List of s3 paths attached to every email.
+                Defaults to None.
+
+        Returns:
+            int: Number of emails enqueued.
+        """
+        from src.notifications.email.dedup import email_deduplicator
+        from src.notifications.jobs.send_email import SendEmailBatch
+
+        self = cls()
+        messages = [
+            ([email_to] if isinstance(email_to, str) else email_to, self.validate_config(body_config or {}))
+            for email_to, body_config in recipients_with_configs
+        ]
+
+        claimed = email_deduplicator.claim_many(
+            cls.__name__,
+            [(email_to, email_deduplicator.get_digest(body_config, attachments)) for email_to, body_config in messages],
+        )
+        if not all(claimed):
+            logger.info(f"[{cls.__name__}] Dropping {claimed.count(False)} duplicate emails")
+            messages = [message for message, is_claimed in zip(messages, claimed) if is_claimed]
+
+        batch_size = config.EMAIL_BATCH_SIZE
+        trace_meta = get_trace_meta()
+        jobs = get_queue(TaskQueue.BULK).enqueue_many(
+            [
+                Queue.prepare_data(
+                    SendEmailBatch().run,
+                    kwargs={
+                        "email_class": cls.__name__,
+                        "messages": messages[start : start + batch_size],
+                        "attachments": attachments,
+                    },
+                    meta=trace_meta,
+                )
+                for start in range(0, len(messages), batch_size)
+            ]
         )
+        record_enqueued(jobs)
+        return len(messages)
@@ -0,0 +1,105 @@
+import hashlib
+import json
+
+import redis
+from loguru import logger
+
+from src.core.config import config
+from src.core.helpers.redis import cache
+
+
+class EmailDeduplicator:
+    """
+    Drops and coalesces repeated emails before and after they are queued.
+
+    A send is identified by the email class, the recipients and a digest of the payload. The
+    same send repeated within `dedup_ttl_seconds`, e.g. a client retrying a request, is dropped
+    before it reaches the queue.
+
+    Emails whose class sets `coalesce = True` are superseded by newer ones of the same class to
+    the same recipients, e.g. a fresh MFA code replaces the previous one. The digest of the latest
+    send is kept for `coalesce_ttl_seconds`, and queued jobs that are no longer the latest are
+    skipped by the worker. When Redis can't be reached every email is sent.
+    """
+
+    key_prefix = "email"
+
+    def __init__(self, client: redis.Redis, dedup_ttl_seconds: int, coalesce_ttl_seconds: int) -> None:
+        self.client = client
+        self.dedup_ttl_seconds = dedup_ttl_seconds
+        self.coalesce_ttl_seconds = coalesce_ttl_seconds
+
+    @staticmethod
+    def get_recipients_key(email_class: str, email_to: list[str]) -> str:
+        return f"{email_class}:{','.join(sorted(email.lower() for email in email_to))}"
+
+    @staticmethod
+    def get_digest(body_config: dict, attachments: list[dict[str, str]] | None = None) -> str:
+        payload = json.dumps({"body_config": body_config, "attachments": attachments}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_dedup_key(self, email_class: str, email_to: list[str], digest: str) -> str:
+        return f"{self.key_prefix}:dedup:{self.get_recipients_key(email_class, email_to)}:{digest}"
+
+    def get_latest_key(self, email_class: str, email_to: list[str]) -> str:
+        return f"{self.key_prefix}:latest:{self.get_recipients_key(email_class, email_to)}"
+
+    def claim_many(self, email_class: str, sends: list[tuple[list[str], str]], coalesce: bool = False) -> list[bool]:
+        """
+        Claim several sends in one pipelined round trip, recording each claimed send as the latest
+        one for its recipients when `coalesce` is set.
+
+        Args:
+            email_class (str): Name of the email class.
+            sends (list[tuple[list[str], str]]): (email_to, digest) pairs.
+            coalesce (bool, optional): Whether newer sends supersede queued ones. Defaults to False.
+
+        Returns:
+            list[bool]: Whether each send should be enqueued, False for duplicates within the window.
+        """
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            for email_to, digest in sends:
+                pipeline.set(self.get_dedup_key(email_class, email_to, digest), 1, nx=True, ex=self.dedup_ttl_seconds)
+            claimed = [bool(result) for result in pipeline.execute()]
+
+            if coalesce and any(claimed):
+                for (email_to, digest), is_claimed in zip(sends, claimed):
+                    if is_claimed:
+                        pipeline.set(self.get_latest_key(email_class, email_to), digest, ex=self.coalesce_ttl_seconds)
+                pipeline.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Email de-duplication is unavailable, sending every {email_class}: {str(e)}")
+            return [True] * len(sends)
+
+        return claimed
+
+    def claim(self, email_class: str, email_to: list[str], digest: str, coalesce: bool = False) -> bool:
+        return self.claim_many(email_class, [(email_to, digest)], coalesce=coalesce)[0]
+
+    def is_latest(self, email_class: str, email_to: list[str], digest: str) -> bool:
+        """
+        Check whether a queued send is still the latest one for its recipients.
+
+        Args:
+            email_class (str): Name of the email class.
+            email_to (list[str]): Recipient email addresses.
+            digest (str): Digest of the queued payload.
+
+        Returns:
+            bool: False if a newer send superseded it.
+        """
+        try:
+            latest_digest = self.client.get(self.get_latest_key(email_class, email_to))
+        except redis.RedisError as e:
+            logger.warning(f"Email de-duplication is unavailable, sending {email_class}: {str(e)}")
+            return True
+
+        return latest_digest is None or latest_digest.decode("utf-8") == digest
+
+
+email_deduplicator = EmailDeduplicator(
+    client=cache,
+    dedup_ttl_seconds=config.EMAIL_DEDUP_TTL_SECONDS,
+    coalesce_ttl_seconds=config.EMAIL_COALESCE_TTL_SECONDS,
+)
@@ -1,6 +1,7 @@
 from pydantic import AnyHttpUrl, BaseModel
 
 from src.core.config import config
+from src.core.constants import TaskQueue
 from src.notifications.email.base import EmailBase
 
 
@@ -13,3 +14,6 @@ class MFAConfigSchema(BaseModel):
 class MFAEmail(EmailBase):
     schema = MFAConfigSchema
     subject = "Your Login Verification Code"
+    queue_name = TaskQueue.CRITICAL
+    # Only the latest code is valid, older queued codes aren't worth sending
+    coalesce = True
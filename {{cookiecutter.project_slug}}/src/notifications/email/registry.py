@@ -0,0 +1,90 @@
+import importlib
+import inspect
+import os
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+from loguru import logger
+
+from src.core.config import config
+from src.core.constants import Environment as AppEnvironment
+from src.notifications.email.base import EmailBase
+
+EMAIL_TEMPLATES_DIR = os.path.dirname(os.path.abspath(__file__))
+EMAIL_PACKAGE = "src.notifications.email"
+
+
+class EmailTemplateRegistry:
+    """
+    Discovers every `EmailBase` subclass under `src/notifications/email/` once and serves their
+    templates from a shared Jinja environment.
+
+    Compiled templates are kept in memory and their bytecode is cached on disk, so other workers
+    and forked job processes skip compilation too. With `auto_reload` enabled, templates are
+    recompiled when their file changes.
+    """
+
+    def __init__(self, templates_dir: str, auto_reload: bool) -> None:
+        self.templates_dir = templates_dir
+        self.environment = Environment(
+            loader=FileSystemLoader(templates_dir),
+            bytecode_cache=FileSystemBytecodeCache(),
+            auto_reload=auto_reload,
+        )
+        self.email_classes: dict[str, type[EmailBase]] = {}
+        self.template_names: dict[type[EmailBase], str] = {}
+        self.discovered = False
+
+    def import_email_modules(self) -> None:
+        # The email packages have no __init__.py, so walk the directory instead of using pkgutil
+        for dir_path, _, file_names in os.walk(self.templates_dir):
+            for file_name in file_names:
+                if not file_name.endswith(".py") or file_name == "__init__.py":
+                    continue
+                relative_path = os.path.relpath(os.path.join(dir_path, file_name[:-3]), self.templates_dir)
+                importlib.import_module(f"{EMAIL_PACKAGE}.{relative_path.replace(os.sep, '.')}")
+
+    def get_subclasses(self, cls: type[EmailBase]) -> list[type[EmailBase]]:
+        subclasses = []
+        for subclass in cls.__subclasses__():
+            subclasses.append(subclass)
+            subclasses.extend(self.get_subclasses(subclass))
+
+        return subclasses
+
+    def discover(self) -> None:
+        """
+        Import every email module, register its `EmailBase` subclasses and compile their templates.
+        """
+        if self.discovered:
+            return
+
+        self.import_email_modules()
+        for email_class in self.get_subclasses(EmailBase):
+            class_dir = os.path.dirname(inspect.getfile(email_class))
+            template_name = os.path.relpath(os.path.join(class_dir, "template.html"), self.templates_dir)
+
+            self.email_classes[email_class.__name__] = email_class
+            self.template_names[email_class] = template_name.replace(os.sep, "/")
+            self.environment.get_template(self.template_names[email_class])
+
+        self.discovered = True
+        logger.info(f"Registered {len(self.email_classes)} email templates")
+
+    def get_email_class(self, name: str) -> type[EmailBase]:
+        self.discover()
+        return self.email_classes[name]
+
+    def get_template(self, email_class: type[EmailBase]) -> Template:
+        """
+        Returns:
+            Template: The compiled template of the given email class.
+        """
+        self.discover()
+        # The environment keeps compiled templates cached and only checks the file when auto reloading
+        return self.environment.get_template(self.template_names[email_class])
+
+
+email_template_registry = EmailTemplateRegistry(
+    templates_dir=EMAIL_TEMPLATES_DIR,
+    auto_reload=config.ENVIRONMENT == AppEnvironment.LOCAL,
+)
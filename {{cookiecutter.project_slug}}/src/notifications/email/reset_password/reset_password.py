@@ -1,5 +1,6 @@
 from pydantic import AnyHttpUrl, BaseModel
 
+from src.core.constants import TaskQueue
 from src.notifications.email.base import EmailBase
 
 
@@ -10,3 +11,6 @@ class ResetPasswordSchema(BaseModel):
 class ResetPasswordEmail(EmailBase):
     schema = ResetPasswordSchema
     subject = "Reset password instructions"
+    queue_name = TaskQueue.CRITICAL
+    # Repeated requests only need the most recent link delivered
+    coalesce = True
@@ -0,0 +1,79 @@
+from loguru import logger
+
+from src.core.config import config
+from src.core.helpers.email import EmailHelper
+
+
+class SendEmail:
+    """
+    Renders and sends an email in the worker from the compact payload enqueued by `EmailBase.send_email`.
+    """
+
+    def __init__(self):
+        self.log_prefix = f"[{self.__class__.__name__}]"
+
+    def run(
+        self,
+        email_class: str,
+        email_to: list[str],
+        body_config: dict,
+        attachments: list[dict[str, str]] | None = None,
+        digest: str | None = None,
+    ):
+        from src.notifications.email.dedup import email_deduplicator
+        from src.notifications.email.registry import email_template_registry
+
+        # Set for coalescing classes, a newer email to the same recipients supersedes this one
+        if digest is not None and not email_deduplicator.is_latest(email_class, email_to, digest):
+            logger.info(f"{self.log_prefix} Skipping {email_class} for {email_to}, superseded by a newer email")
+            return False
+
+        logger.info(f"{self.log_prefix} Rendering {email_class} for {email_to}")
+        email = email_template_registry.get_email_class(email_class)()
+        body = email.get_rendered_template(body_config)
+
+        return EmailHelper().send_email(
+            email_from=config.SMTP_EMAIL_FROM,
+            email_to=email_to,
+            email_subject=email.get_subject(),
+            email_body=body,
+            attachments=attachments,
+        )
+
+
+class SendEmailBatch:
+    """
+    Renders and sends a batch of emails of one class enqueued by `EmailBase.send_many`.
+    """
+
+    def __init__(self):
+        self.log_prefix = f"[{self.__class__.__name__}]"
+
+    def run(
+        self,
+        email_class: str,
+        messages: list[tuple[list[str], dict]],
+        attachments: list[dict[str, str]] | None = None,
+    ) -> list[bool]:
+        from src.notifications.email.registry import email_template_registry
+
+        logger.info(f"{self.log_prefix} Rendering {len(messages)} {email_class} emails")
+        email = email_template_registry.get_email_class(email_class)()
+        email_subject = email.get_subject()
+        template = email.get_template()
+
+        results = EmailHelper().send_emails(
+            [
+                {
+                    "email_from": config.SMTP_EMAIL_FROM,
+                    "email_to": email_to,
+                    "email_subject": email_subject,
+                    "email_body": email.render_template(template, body_config),
+                    "attachments": attachments,
+                }
+                for email_to, body_config in messages
+            ]
+        )
+        logger.info(f"{self.log_prefix} Sent {sum(results)} of {len(messages)} {email_class} emails")
+
+        return results
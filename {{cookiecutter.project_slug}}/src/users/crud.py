@@ -1,8 +1,12 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from src.database.crud_base import CRUDBase
 from src.users.models import BlacklistedToken, MFAAttempt, User
 
 
-class CRUDUser(CRUDBase): ...
+class CRUDUser(CRUDBase):
+    async def get_by_email(self, db: AsyncSession, email: str) -> User | None:
+        return await self.get_by_field(db, field=User.email, value=email)
 
 
 crud_user = CRUDUser(model=User)
@@ -3,7 +3,7 @@ from datetime import datetime, timedelta, timezone
 from loguru import logger
 
 from src.core.config import config
-from src.core.constants import TokenType
+from src.core.constants import TaskQueue, TokenType
 from src.core.helpers.redis import cache
 from src.database.session import AsyncSessionLocal
 from src.users.crud import crud_blacklisted_token
@@ -12,6 +12,7 @@ from src.users.models import BlacklistedToken
 
 class PreloadBlacklistedTokens:
     cache_key_prefix = "blacklist"
+    queue_name = TaskQueue.BULK
 
     def __init__(self):
         self.log_prefix = f"[{self.__class__.__name__}]"
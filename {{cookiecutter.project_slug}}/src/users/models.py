@@ -35,8 +35,10 @@ class User(Base):
 
     assigned_roles: Mapped[list] = mapped_column(ARRAY(ENUM(UserRoles, create_type=True)), nullable=False)
 
+    # Pending MFA attempts are kept in Redis (see MFAAttemptStore), so the table isn't loaded with every user
     active_mfa_attempt: Mapped[Optional["MFAAttempt"]] = relationship(
         back_populates="user",
+        lazy="noload",
         uselist=False,
         cascade="all, delete-orphan",
     )